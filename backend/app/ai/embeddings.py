@@ -1,60 +1,269 @@
 import chromadb
+import hashlib
+import os
+import random
+import threading
+import time
+import logging
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
 from chromadb.utils import embedding_functions
 from app.core.config import settings
+from app.utils.disk_cache import DiskCache
+from app.ai.local_embeddings import HashedNgramEmbeddingFunction
+from app.ai.vector_store import NumpyVectorStore
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Vectors by (model, text), stored as raw float32 bytes. Shared by every course, so an
+# identical chunk or lesson spec is embedded once, and repeated query specs never leave the box.
+embedding_cache = DiskCache(
+    path=os.path.join(settings.CACHE_DIR, "embedding_cache.sqlite3"),
+    table="embeddings",
+    ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+    max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+    dumps=lambda vector: np.asarray(vector, dtype=np.float32).tobytes(),
+    loads=lambda blob: np.frombuffer(blob, dtype=np.float32)
+)
+
+def embedding_cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+# Rough OpenAI tokenizer ratio for English; only used to size request batches
+CHARS_PER_TOKEN = 4
+# HTTP statuses that won't improve on retry
+_NO_RETRY_STATUSES = {400, 401, 403, 404, 422}
+
+# Caps in-flight upstream embedding requests across all callers in the process
+_upstream_slots = threading.BoundedSemaphore(settings.EMBEDDING_CONCURRENCY)
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def token_batches(items: List[Tuple[str, str]], max_tokens: int, max_items: int) -> List[List[Tuple[str, str]]]:
+    """
+    Packs (key, text) pairs, in order, into batches of at most `max_tokens` estimated
+    tokens and `max_items` inputs. A text over the budget on its own gets its own batch.
+    """
+    batches: List[List[Tuple[str, str]]] = []
+    current: List[Tuple[str, str]] = []
+    current_tokens = 0
+    for key, text in items:
+        tokens = estimate_tokens(text)
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append((key, text))
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+class CachedEmbeddingFunction:
+    """
+    Wraps a Chroma embedding function with embedding_cache: cached texts are a local
+    lookup, and only the misses (deduplicated) go upstream. Misses are packed into
+    token-budgeted batches that run concurrently (EMBEDDING_CONCURRENCY) with retry and
+    exponential backoff; each batch is cached as soon as it lands.
+    """
+    def __init__(self, inner, model_name: str):
+        self.inner = inner
+        self.model_name = model_name
+        self.max_batch_tokens = settings.EMBEDDING_BATCH_MAX_TOKENS
+        self.max_batch_items = settings.EMBEDDING_BATCH_MAX_ITEMS
+        self.concurrency = settings.EMBEDDING_CONCURRENCY
+        self.max_retries = settings.EMBEDDING_MAX_RETRIES
+        self.backoff_seconds = settings.EMBEDDING_RETRY_BACKOFF_SECONDS
+
+    def __call__(self, texts: List[str]) -> List[np.ndarray]:
+        if not texts:
+            return []
+        keys = [embedding_cache_key(self.model_name, text) for text in texts]
+        vectors: Dict[str, np.ndarray] = embedding_cache.get_many(list(dict.fromkeys(keys)))
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if missing:
+            batches = token_batches(list(missing.items()), self.max_batch_tokens, self.max_batch_items)
+            if len(batches) == 1:
+                vectors.update(self._embed_batch(batches[0]))
+            else:
+                with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as pool:
+                    for computed in pool.map(self._embed_batch, batches):
+                        vectors.update(computed)
+            logger.info(
+                f"Embedded {len(missing)} texts upstream in {len(batches)} batches, "
+                f"{len(texts) - len(missing)} from cache."
+            )
+        return [vectors[key] for key in keys]
+
+    def _embed_batch(self, batch: List[Tuple[str, str]]) -> Dict[str, np.ndarray]:
+        """One upstream request (with retries); caches and returns {key: vector}."""
+        texts = [text for _, text in batch]
+        for attempt in range(self.max_retries + 1):
+            try:
+                with _upstream_slots:
+                    fresh = self.inner(texts)
+                break
+            except Exception as e:
+                status = getattr(e, "status_code", None)
+                if attempt == self.max_retries or status in _NO_RETRY_STATUSES:
+                    raise
+                delay = self.backoff_seconds * (2 ** attempt) + random.uniform(0, self.backoff_seconds)
+                logger.warning(f"Embedding batch of {len(texts)} failed ({e}); retry {attempt + 1} in {delay:.1f}s")
+                time.sleep(delay)
+
+        computed = {key: np.asarray(vector, dtype=np.float32) for (key, _), vector in zip(batch, fresh)}
+        embedding_cache.set_many(computed)
+        return computed
 
 # Lazy initialization
 _chroma_client = None
 _collection = None
+_embedding_function = None
+_vector_store = None
+_vector_store_lock = threading.Lock()
+
+def get_embedding_function():
+    """
+    Lazy initialization of the embedding function selected by EMBEDDING_BACKEND:
+    openai (cached, see CachedEmbeddingFunction) or local (hashed n-grams, CPU only,
+    no network; cheaper to recompute than to look up, so not cached).
+    """
+    global _embedding_function
+
+    if _embedding_function is None and settings.EMBEDDING_BACKEND == "local":
+        _embedding_function = HashedNgramEmbeddingFunction(dim=settings.LOCAL_EMBEDDING_DIM)
+
+    if _embedding_function is None:
+        if not settings.OPENAI_API_KEY:
+            raise ValueError("OPENAI_API_KEY must be set for embeddings")
+
+        _embedding_function = CachedEmbeddingFunction(
+            embedding_functions.OpenAIEmbeddingFunction(
+                api_key=settings.OPENAI_API_KEY,
+                model_name=EMBEDDING_MODEL,
+                api_base=settings.OPENAI_BASE_URL
+            ),
+            model_name=EMBEDDING_MODEL
+        )
+
+    return _embedding_function
+
+def embed_texts(texts: List[str]) -> List[np.ndarray]:
+    """
+    Embeddings for `texts` in order, through the cache. Pass the result to Chroma as
+    `embeddings=` / `query_embeddings=` so the collection never re-embeds on its own.
+    """
+    return get_embedding_function()(texts)
+
+def collection_name() -> str:
+    """
+    OpenAI vectors live in "lesson_transcripts"; local vectors differ in dimension and
+    meaning, so each local model config gets its own collection.
+    """
+    if settings.EMBEDDING_BACKEND == "local":
+        return f"lesson_transcripts_{get_embedding_function().model_name}"
+    return "lesson_transcripts"
 
 def get_chroma_collection():
     """Lazy initialization of ChromaDB collection"""
     global _chroma_client, _collection
     
+    if _collection is None and settings.EMBEDDING_BACKEND == "local":
+        # Always written/queried with precomputed vectors, so no embedding function
+        _chroma_client = chromadb.PersistentClient(path=settings.CHROMA_DB_PATH)
+        _collection = _chroma_client.get_or_create_collection(
+            name=collection_name(),
+            embedding_function=None
+        )
+    
     if _collection is None:
         if not settings.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY must be set for embeddings")
             
         # Initialize Chroma (Persistent or volatile for MVP)
-        _chroma_client = chromadb.PersistentClient(path="./chroma_db")
+        _chroma_client = chromadb.PersistentClient(path=settings.CHROMA_DB_PATH)
         
-        # Use OpenAI embedding function
+        # The collection keeps the OpenAI function it was created with; our own calls
+        # pass precomputed vectors from embed_texts, so it's only a fallback
         openai_ef = embedding_functions.OpenAIEmbeddingFunction(
             api_key=settings.OPENAI_API_KEY,
-            model_name="text-embedding-3-small",
+            model_name=EMBEDDING_MODEL,
             api_base=settings.OPENAI_BASE_URL
         )
         
         # Get or create collection
         _collection = _chroma_client.get_or_create_collection(
-            name="lesson_transcripts",
+            name=collection_name(),
             embedding_function=openai_ef
         )
     
     return _collection
 
+def get_vector_collection():
+    """
+    The vector collection selected by VECTOR_STORE: chroma (default) or numpy
+    (NumpyVectorStore, memory-mapped under VECTOR_STORE_PATH). Both take precomputed
+    vectors and return Chroma-shaped results, so callers don't care which one they get.
+    """
+    global _vector_store
+    
+    if settings.VECTOR_STORE != "numpy":
+        return get_chroma_collection()
+    
+    if _vector_store is None:
+        with _vector_store_lock:
+            if _vector_store is None:
+                _vector_store = NumpyVectorStore(os.path.join(settings.VECTOR_STORE_PATH, collection_name()))
+    
+    return _vector_store
+
 class EmbeddingService:
+    # Rows per vector-store write
+    WRITE_BATCH_SIZE = 1000
+
     @staticmethod
     def add_transcript_chunks(lesson_id: str, text: str):
-        collection = get_chroma_collection()
+        EmbeddingService.add_transcript_chunks_bulk([(lesson_id, text)])
+
+    @staticmethod
+    def add_transcript_chunks_bulk(lesson_texts: List[Tuple[str, str]]) -> int:
+        """
+        Chunks every (lesson_id, text) pair, embeds all chunks in one embed_texts call
+        (token-batched, concurrent upstream) and writes them in bulk. Returns the chunk count.
+        """
+        collection = get_vector_collection()
         
         # Simple chunking
         chunk_size = 1000
-        chunks = [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
+        documents, ids, metadatas = [], [], []
+        for lesson_id, text in lesson_texts:
+            chunks = [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
+            documents.extend(chunks)
+            ids.extend(f"{lesson_id}_chunk_{i}" for i in range(len(chunks)))
+            metadatas.extend({"lesson_id": lesson_id, "chunk_index": i} for i in range(len(chunks)))
+        if not documents:
+            return 0
         
-        ids = [f"{lesson_id}_chunk_{i}" for i in range(len(chunks))]
-        metadatas = [{"lesson_id": lesson_id, "chunk_index": i} for i in range(len(chunks))]
-        
-        collection.add(
-            documents=chunks,
-            ids=ids,
-            metadatas=metadatas
-        )
+        embeddings = embed_texts(documents)
+        for start in range(0, len(ids), EmbeddingService.WRITE_BATCH_SIZE):
+            end = start + EmbeddingService.WRITE_BATCH_SIZE
+            collection.add(
+                documents=documents[start:end],
+                embeddings=embeddings[start:end],
+                ids=ids[start:end],
+                metadatas=metadatas[start:end]
+            )
+        return len(documents)
 
     @staticmethod
     def query_similar(query_text: str, n_results: int = 3):
-        collection = get_chroma_collection()
+        collection = get_vector_collection()
         results = collection.query(
-            query_texts=[query_text],
+            query_embeddings=embed_texts([query_text]),
             n_results=n_results
         )
         return results
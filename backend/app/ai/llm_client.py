@@ -1,50 +1,172 @@
 import json
+import hashlib
+import os
 from app.ai.roadmap_generator import get_openai_client
-from app.ai.prompts import LESSON_SPEC_PROMPT, COVERAGE_ANALYSIS_PROMPT, SUPPLEMENT_GENERATION_PROMPT
+from app.ai.prompts import LESSON_SPEC_PROMPT, LESSON_SPECS_BATCH_PROMPT, COVERAGE_ANALYSIS_PROMPT, SUPPLEMENT_GENERATION_PROMPT
+from app.core.config import settings
+from app.utils.disk_cache import DiskCache
+from typing import Dict, List, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+LLM_MODEL = "openai/gpt-4o-mini"
+# Keeps a single batched spec request comfortably inside the output token budget
+MAX_SPECS_PER_REQUEST = 40
+
+# Content-addressed responses for the deterministic prompts below, so a force rebuild
+# of a course costs (close to) zero LLM calls. Fallback answers are never cached.
+llm_cache = DiskCache(
+    path=os.path.join(settings.CACHE_DIR, "llm_cache.sqlite3"),
+    table="llm_responses",
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES
+)
+
+def llm_cache_key(template: str, inputs: dict, **params) -> str:
+    """Hash of model + prompt template + inputs + request params; editing a template invalidates its entries."""
+    payload = json.dumps(
+        {"model": LLM_MODEL, "template": template, "inputs": inputs, "params": params},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
 class LLMClient:
     def generate_lesson_spec(self, title: str, description: str) -> str:
+        cache_key = llm_cache_key(LESSON_SPEC_PROMPT, {"title": title, "description": description}, max_tokens=200)
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         client = get_openai_client()
         content = LESSON_SPEC_PROMPT.format(title=title, description=description)
         try:
             response = client.chat.completions.create(
-                model="openai/gpt-4o-mini",
+                model=LLM_MODEL,
                 messages=[{"role": "user", "content": content}],
                 max_tokens=200
             )
-            return response.choices[0].message.content.strip()
+            spec = response.choices[0].message.content.strip()
+            llm_cache.set(cache_key, spec)
+            return spec
         except Exception as e:
             logger.error(f"LLM Error (Spec): {e}")
             return f"Teach: {title}" # Fallback
 
+    def generate_lesson_specs(self, lessons: List[Tuple[str, str]]) -> List[str]:
+        """
+        Specs for many (title, description) pairs, in order, with one JSON-mode request
+        for all lessons not already cached. Lessons whose spec is missing or malformed in the
+        batched answer fall back to generate_lesson_spec individually.
+        """
+        specs: List[str] = [None] * len(lessons)
+        batch_keys = [
+            llm_cache_key(LESSON_SPECS_BATCH_PROMPT, {"title": title, "description": description})
+            for title, description in lessons
+        ]
+        single_keys = [
+            llm_cache_key(LESSON_SPEC_PROMPT, {"title": title, "description": description}, max_tokens=200)
+            for title, description in lessons
+        ]
+        cached = llm_cache.get_many(list(dict.fromkeys(batch_keys)))
+        # Specs cached by the per-lesson fallback, looked up only for the batch misses and
+        # not counted again, so each lesson is one hit or one miss in the cache stats
+        fallback_keys = [single_keys[i] for i in range(len(lessons)) if batch_keys[i] not in cached]
+        fallback = llm_cache.get_many(list(dict.fromkeys(fallback_keys)), record_stats=False)
+        for i in range(len(lessons)):
+            specs[i] = cached.get(batch_keys[i], fallback.get(single_keys[i]))
+
+        missing = [i for i, spec in enumerate(specs) if spec is None]
+        for start in range(0, len(missing), MAX_SPECS_PER_REQUEST):
+            chunk = missing[start:start + MAX_SPECS_PER_REQUEST]
+            parsed = self._request_lesson_specs([(i, *lessons[i]) for i in chunk])
+            llm_cache.set_many({batch_keys[i]: spec for i, spec in parsed.items()})
+            for i, spec in parsed.items():
+                specs[i] = spec
+
+        # Per-lesson fallback only for what the batch didn't give us
+        for i, spec in enumerate(specs):
+            if spec is None:
+                specs[i] = self.generate_lesson_spec(*lessons[i])
+        return specs
+
+    def _request_lesson_specs(self, lessons: List[Tuple[int, str, str]]) -> Dict[int, str]:
+        """One batched spec request; returns {index: spec} for the entries that parsed cleanly."""
+        wanted = {index for index, _, _ in lessons}
+        lessons_json = json.dumps(
+            [{"index": index, "title": title, "description": description} for index, title, description in lessons],
+            ensure_ascii=False
+        )
+        content = LESSON_SPECS_BATCH_PROMPT.format(lessons_json=lessons_json)
+        try:
+            client = get_openai_client()
+            response = client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=[{"role": "user", "content": content}],
+                response_format={"type": "json_object"},
+                max_tokens=min(120 * len(lessons) + 100, 8000)
+            )
+            data = json.loads(response.choices[0].message.content)
+        except Exception as e:
+            logger.error(f"LLM Error (Batch Spec): {e}")
+            return {}
+
+        parsed: Dict[int, str] = {}
+        entries = data.get("specs") if isinstance(data, dict) else None
+        for entry in entries if isinstance(entries, list) else []:
+            if not isinstance(entry, dict):
+                continue
+            index, spec = entry.get("index"), entry.get("spec")
+            if isinstance(index, int) and index in wanted and isinstance(spec, str) and spec.strip():
+                parsed[index] = spec.strip()
+        if len(parsed) < len(wanted):
+            logger.warning(f"Batch spec response covered {len(parsed)}/{len(wanted)} lessons")
+        return parsed
+
     def analyze_coverage(self, lesson_spec: str, transcript_text: str) -> dict:
+        transcript_text = transcript_text[:4000] # Truncate to avoid context limit
+        cache_key = llm_cache_key(
+            COVERAGE_ANALYSIS_PROMPT,
+            {"lesson_spec": lesson_spec, "transcript_text": transcript_text},
+            max_tokens=500, json_mode=True
+        )
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         client = get_openai_client()
-        content = COVERAGE_ANALYSIS_PROMPT.format(lesson_spec=lesson_spec, transcript_text=transcript_text[:4000]) # Truncate to avoid context limit
+        content = COVERAGE_ANALYSIS_PROMPT.format(lesson_spec=lesson_spec, transcript_text=transcript_text)
         try:
             response = client.chat.completions.create(
-                model="openai/gpt-4o-mini",
+                model=LLM_MODEL,
                 messages=[{"role": "user", "content": content}],
                 response_format={"type": "json_object"},
                 max_tokens=500
             )
-            return json.loads(response.choices[0].message.content)
+            result = json.loads(response.choices[0].message.content)
+            llm_cache.set(cache_key, result)
+            return result
         except Exception as e:
             logger.error(f"LLM Error (Coverage): {e}")
             return {"score": 0.5, "reason": "Error in analysis", "covered_concepts": [], "missing_concepts": []}
 
     def generate_supplement(self, topic: str, level: str) -> str:
+        cache_key = llm_cache_key(SUPPLEMENT_GENERATION_PROMPT, {"topic": topic, "level": level}, max_tokens=1500)
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         client = get_openai_client()
         content = SUPPLEMENT_GENERATION_PROMPT.format(topic=topic, level=level)
         try:
             response = client.chat.completions.create(
-                model="openai/gpt-4o-mini",
+                model=LLM_MODEL,
                 messages=[{"role": "user", "content": content}],
                 max_tokens=1500
             )
-            return response.choices[0].message.content.strip()
+            text = response.choices[0].message.content.strip()
+            llm_cache.set(cache_key, text)
+            return text
         except Exception as e:
             logger.error(f"LLM Error (Supplement): {e}")
             return "Content generation failed. Please check back later."
@@ -52,12 +174,12 @@ class LLMClient:
     def get_completion(self, messages: list, json_mode: bool = False) -> str:
         client = get_openai_client()
         kwargs = {
-            "model": "openai/gpt-4o-mini",
+            "model": LLM_MODEL,
             "messages": messages,
         }
         if json_mode:
             kwargs["response_format"] = {"type": "json_object"}
-            
+
         try:
             response = client.chat.completions.create(**kwargs)
             return response.choices[0].message.content.strip()
@@ -65,4 +187,8 @@ class LLMClient:
             logger.error(f"LLM Generics Error: {e}")
             raise e
 
+    def cache_stats(self) -> dict:
+        """Hit/miss counters of the response cache."""
+        return llm_cache.stats()
+
 llm_client = LLMClient()
@@ -0,0 +1,69 @@
+from collections import Counter
+from functools import lru_cache
+from typing import List, Tuple
+import hashlib
+import math
+import re
+import numpy as np
+
+_WORD_RE = re.compile(r"\w+")
+# Function words carry no topic signal but would dominate short queries
+_STOP_WORDS = frozenset("""
+a an and are as at be but by can do does for from how i in into is it its of on or so
+that the this to was what when where which who why will with you your we our
+""".split())
+
+@lru_cache(maxsize=1 << 18)
+def _bucket(feature: str, dim: int) -> Tuple[int, float]:
+    """Stable (bucket, sign) for a feature; Python's hash() is salted per process, so use blake2b."""
+    h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+    return h % dim, (1.0 if (h >> 63) & 1 else -1.0)
+
+class HashedNgramEmbeddingFunction:
+    """
+    CPU-only, network-free text embeddings: word unigrams/bigrams plus character
+    n-grams of every word, feature-hashed (signed) into `dim` buckets with sublinear
+    term frequency, then L2-normalized. Lexical rather than semantic, but deterministic,
+    instant to start and free, which is what offline re-indexing and benchmarks need.
+    Same call shape as Chroma embedding functions: list of texts -> list of vectors.
+    """
+    WORD_WEIGHT = 1.0
+    BIGRAM_WEIGHT = 0.7
+    CHAR_WEIGHT = 0.4
+
+    def __init__(self, dim: int = 512, char_ngram_range: Tuple[int, int] = (3, 5)):
+        self.dim = dim
+        self.char_ngram_range = char_ngram_range
+
+    @property
+    def model_name(self) -> str:
+        lo, hi = self.char_ngram_range
+        return f"hashed-ngram-{self.dim}-c{lo}{hi}"
+
+    def _features(self, text: str) -> Counter:
+        words = [w for w in _WORD_RE.findall((text or "").lower()) if w not in _STOP_WORDS]
+        features: Counter = Counter()
+        lo, hi = self.char_ngram_range
+        for word in words:
+            features["w:" + word] += 1
+            padded = f"<{word}>"
+            for n in range(lo, hi + 1):
+                for i in range(len(padded) - n + 1):
+                    features["c:" + padded[i:i + n]] += 1
+        for first, second in zip(words, words[1:]):
+            features[f"b:{first} {second}"] += 1
+        return features
+
+    def embed_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        weights = {"w": self.WORD_WEIGHT, "b": self.BIGRAM_WEIGHT, "c": self.CHAR_WEIGHT}
+        for feature, count in self._features(text).items():
+            bucket, sign = _bucket(feature, self.dim)
+            vector[bucket] += sign * weights[feature[0]] * (1.0 + math.log(count))
+        norm = float(np.linalg.norm(vector))
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def __call__(self, texts: List[str]) -> List[np.ndarray]:
+        return [self.embed_one(text) for text in texts]
@@ -11,6 +11,23 @@ Format: "Teach: X, Y; Level: beginner; Example: show code snippet for Z"
 Output ONLY the sentence.
 """
 
+# 2b) Batched Lesson Specs: same as above for a whole roadmap in one JSON-mode request
+LESSON_SPECS_BATCH_PROMPT = """
+For each lesson below, create a single short description (1-2 sentences) that captures the exact concepts to teach, ideal depth, and example requirement.
+Format of each description: "Teach: X, Y; Level: beginner; Example: show code snippet for Z"
+
+Lessons (JSON list, "index" identifies the lesson):
+{lessons_json}
+
+Return JSON:
+{{
+    "specs": [
+        {{ "index": <lesson index>, "spec": "<description>" }}
+    ]
+}}
+Include every lesson index exactly once.
+"""
+
 # 3) Coverage Justification/Analysis
 # We use this to actually score or verify coverage if simple similarity isn't enough
 COVERAGE_ANALYSIS_PROMPT = """
@@ -1,8 +1,13 @@
 from openai import OpenAI
+import copy
 import json
 from app.core.config import settings
+from app.utils.disk_cache import normalize_query
+from app.utils.single_flight import SingleFlight
 
 _openai_client = None
+# Users generating the same trending topic at once share one LLM call
+_roadmap_flight = SingleFlight()
 
 def get_openai_client():
     """Lazy initialization of OpenAI client"""
@@ -17,6 +22,12 @@ def get_openai_client():
     return _openai_client
 
 def generate_roadmap(topic: str, level: str, language: str = "English"):
+    key = "|".join(normalize_query(v) for v in (topic, level, language))
+    roadmap = _roadmap_flight.do(key, _generate_roadmap_uncached, topic, level, language)
+    # Callers enrich the roadmap in place, so each one needs its own copy
+    return copy.deepcopy(roadmap)
+
+def _generate_roadmap_uncached(topic: str, level: str, language: str):
     client = get_openai_client()
     
     prompt = f"""
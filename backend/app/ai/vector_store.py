@@ -0,0 +1,306 @@
+import json
+import os
+import sqlite3
+import threading
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class NumpyVectorStore:
+    """
+    In-process vector collection: float32 vectors in a memory-mapped file (one row per
+    chunk, append-only, grown by doubling) plus a SQLite table for ids, documents and
+    metadata. Opening it reads only ids and video ids, so startup is near-instant.
+
+    Search is exact: squared L2 (Chroma's default space, so distances are comparable)
+    via one matrix product per query batch. Rows of a video are tracked as row ranges,
+    so a `video_id` filter scores only those slices of the memmap, without copying.
+
+    Deleted rows are dropped from the id map and the row ranges (their vector slots are
+    simply left unused), so they are never scanned again.
+
+    Implements the subset of the Chroma Collection API the services use
+    (get / add / upsert / delete / query / count), with Chroma-shaped results.
+    """
+    GROWTH_ROWS = 1024
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.name = os.path.basename(os.path.normpath(path))
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(path, "meta.sqlite3"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS rows ("
+            "row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, video_id TEXT, "
+            "document TEXT, metadata TEXT)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT)")
+        self._db.commit()
+
+        dim = self._db.execute("SELECT value FROM info WHERE key = 'dim'").fetchone()
+        self.dim: Optional[int] = int(dim[0]) if dim else None
+        self._vectors: Optional[np.memmap] = None
+        self._norms: Optional[np.memmap] = None # squared L2 norm per row
+        self._row_of: Dict[str, int] = {}
+        self._ids: List[str] = [] # row -> id
+        self._video_ranges: Dict[str, List[List[int]]] = {} # video_id -> [[start, end), ...]
+        self._dead: Set[int] = set() # deleted rows below count_rows
+        self.count_rows = 0
+
+        for row, chunk_id, video_id in self._db.execute("SELECT row, id, video_id FROM rows ORDER BY row"):
+            while len(self._ids) < row:
+                # Gap left by a deleted row
+                self._dead.add(len(self._ids))
+                self._ids.append(None)
+            self._row_of[chunk_id] = row
+            self._ids.append(chunk_id)
+            self._add_to_ranges(video_id, row)
+            self.count_rows = row + 1
+        if self.dim is not None:
+            self._open_memmaps(max(self.count_rows, 1))
+
+    # --- storage ---------------------------------------------------------
+
+    def _open_memmaps(self, min_rows: int):
+        """(Re)maps the vector/norm files with room for at least `min_rows` rows."""
+        vec_path = os.path.join(self.path, "vectors.f32")
+        norm_path = os.path.join(self.path, "norms.f32")
+        row_bytes = self.dim * 4
+        current = os.path.getsize(vec_path) // row_bytes if os.path.exists(vec_path) else 0
+        capacity = current
+        if capacity < min_rows:
+            capacity = max(min_rows, capacity * 2, self.GROWTH_ROWS)
+            if self._vectors is not None:
+                self._vectors.flush()
+                self._norms.flush()
+            self._vectors = self._norms = None
+            for file_path, size in ((vec_path, capacity * row_bytes), (norm_path, capacity * 4)):
+                with open(file_path, "ab") as f:
+                    f.truncate(size)
+        if self._vectors is None or len(self._vectors) != capacity:
+            self._vectors = np.memmap(vec_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+            self._norms = np.memmap(norm_path, dtype=np.float32, mode="r+", shape=(capacity,))
+
+    def _add_to_ranges(self, video_id: Optional[str], row: int):
+        if video_id is None:
+            return
+        ranges = self._video_ranges.setdefault(video_id, [])
+        if ranges and ranges[-1][1] == row:
+            ranges[-1][1] = row + 1
+        else:
+            ranges.append([row, row + 1])
+
+    def count(self) -> int:
+        return len(self._row_of)
+
+    # --- writes ----------------------------------------------------------
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+    ):
+        """Inserts new ids (appended, so one video's chunks stay contiguous) and overwrites existing ones in place."""
+        self._write(ids, embeddings, documents, metadatas, replace=True)
+
+    def add(
+        self,
+        ids: List[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+    ):
+        """Like Chroma's add: ids that already exist are left untouched."""
+        self._write(ids, embeddings, documents, metadatas, replace=False)
+
+    def _write(self, ids, embeddings, documents, metadatas, replace: bool):
+        if not ids:
+            return
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2 or len(matrix) != len(ids):
+            raise ValueError("Expected one embedding per id")
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [{}] * len(ids)
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = matrix.shape[1]
+                self._db.execute("INSERT OR REPLACE INTO info (key, value) VALUES ('dim', ?)", (str(self.dim),))
+            elif matrix.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match collection dimensionality {self.dim}")
+
+            rows: List[int] = []
+            records: List[Tuple] = []
+            keep: List[int] = []
+            for i, chunk_id in enumerate(ids):
+                row = self._row_of.get(chunk_id)
+                if row is not None and not replace:
+                    continue
+                if row is None:
+                    row = self.count_rows
+                    self.count_rows += 1
+                    self._row_of[chunk_id] = row
+                    self._ids.append(chunk_id)
+                    self._add_to_ranges((metadatas[i] or {}).get("video_id"), row)
+                rows.append(row)
+                keep.append(i)
+                meta = metadatas[i] or {}
+                records.append((row, chunk_id, meta.get("video_id"), documents[i], json.dumps(meta)))
+            if not rows:
+                return
+
+            self._open_memmaps(self.count_rows)
+            block = matrix[keep]
+            self._vectors[rows] = block
+            self._norms[rows] = np.einsum("ij,ij->i", block, block)
+            self._vectors.flush()
+            self._norms.flush()
+            self._db.executemany(
+                "INSERT OR REPLACE INTO rows (row, id, video_id, document, metadata) VALUES (?, ?, ?, ?, ?)",
+                records
+            )
+            self._db.commit()
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[dict] = None):
+        """Removes the given ids (or every row matching `where`), like Chroma's delete."""
+        with self._lock:
+            if ids is not None:
+                rows = [self._row_of[i] for i in dict.fromkeys(ids) if i in self._row_of]
+            elif where:
+                rows = [row for start, end in self._ranges_for(where) for row in range(start, end)]
+            else:
+                return
+            if not rows:
+                return
+            dead = set(rows)
+            affected = set()
+            for i in range(0, len(rows), 500):
+                batch = rows[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                affected.update(r[0] for r in self._db.execute(
+                    f"SELECT DISTINCT video_id FROM rows WHERE row IN ({placeholders})", batch
+                ))
+                self._db.execute(f"DELETE FROM rows WHERE row IN ({placeholders})", batch)
+            self._db.commit()
+
+            for row in rows:
+                del self._row_of[self._ids[row]]
+                self._ids[row] = None
+            self._dead |= dead
+            # Rebuild the affected videos' ranges without the deleted rows
+            for video_id in affected:
+                ranges = self._video_ranges.pop(video_id, [])
+                for start, end in ranges:
+                    for row in range(start, end):
+                        if row not in dead:
+                            self._add_to_ranges(video_id, row)
+
+    # --- reads -----------------------------------------------------------
+
+    def _load_rows(self, rows: List[int], include: Sequence[str]) -> Dict[int, Tuple]:
+        """row -> (id, document, metadata) for the requested rows."""
+        found: Dict[int, Tuple] = {}
+        for i in range(0, len(rows), 500):
+            batch = rows[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            for row, chunk_id, document, metadata in self._db.execute(
+                f"SELECT row, id, document, metadata FROM rows WHERE row IN ({placeholders})", batch
+            ):
+                found[row] = (
+                    chunk_id,
+                    document if "documents" in include else None,
+                    json.loads(metadata) if "metadatas" in include and metadata else {},
+                )
+        return found
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[dict] = None, include: Sequence[str] = ("metadatas", "documents")) -> Dict[str, Any]:
+        with self._lock:
+            if ids is not None:
+                rows = [self._row_of[i] for i in dict.fromkeys(ids) if i in self._row_of]
+            else:
+                rows = [row for start, end in self._ranges_for(where) for row in range(start, end)]
+            loaded = self._load_rows(rows, include) if include else {}
+            found_ids = [self._ids[row] for row in rows]
+        return {
+            "ids": found_ids,
+            "documents": [loaded[row][1] for row in rows] if "documents" in include else None,
+            "metadatas": [loaded[row][2] for row in rows] if "metadatas" in include else None,
+            "included": list(include),
+        }
+
+    def _ranges_for(self, where: Optional[dict]) -> List[Tuple[int, int]]:
+        if not where:
+            # Everything, split around deleted rows
+            ranges, start = [], 0
+            for row in sorted(self._dead):
+                if row > start:
+                    ranges.append((start, row))
+                start = row + 1
+            if start < self.count_rows:
+                ranges.append((start, self.count_rows))
+            return ranges
+        if set(where) != {"video_id"}:
+            raise ValueError("NumpyVectorStore only filters on video_id")
+        cond = where["video_id"]
+        video_ids = cond["$in"] if isinstance(cond, dict) else [cond]
+        ranges = sorted(tuple(r) for vid in dict.fromkeys(video_ids) for r in self._video_ranges.get(vid, ()))
+        # Neighbouring videos' ranges become one slice
+        merged: List[Tuple[int, int]] = []
+        for start, end in ranges:
+            if merged and merged[-1][1] == start:
+                merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+        return merged
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int = 10,
+        where: Optional[dict] = None,
+        include: Sequence[str] = ("metadatas", "documents", "distances"),
+    ) -> Dict[str, Any]:
+        """Exact top-k by squared L2 for every query; one result list per query, like Chroma."""
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        n_queries = len(queries)
+        empty = {"ids": [[] for _ in range(n_queries)], "distances": [[] for _ in range(n_queries)],
+                 "metadatas": [[] for _ in range(n_queries)], "documents": [[] for _ in range(n_queries)]}
+        with self._lock:
+            ranges = self._ranges_for(where)
+            if not ranges or self._vectors is None or n_queries == 0:
+                return empty
+            if queries.shape[1] != self.dim:
+                raise ValueError(f"Query dimension {queries.shape[1]} does not match collection dimensionality {self.dim}")
+
+            # Score each contiguous row range straight off the mapped file (plain ndarray
+            # views: no copies, and none of np.memmap's per-operation overhead)
+            vectors = np.asarray(self._vectors)
+            row_ids = np.concatenate([np.arange(start, end) for start, end in ranges])
+            dots = np.concatenate([queries @ vectors[start:end].T for start, end in ranges], axis=1)
+            q_norms = np.einsum("ij,ij->i", queries, queries)[:, None]
+            dists = q_norms + np.asarray(self._norms)[row_ids][None, :] - 2.0 * dots
+            k = min(n_results, dists.shape[1])
+            if k < dists.shape[1]:
+                top = np.argpartition(dists, k - 1, axis=1)[:, :k]
+            else:
+                top = np.tile(np.arange(dists.shape[1]), (n_queries, 1))
+            order = np.take_along_axis(dists, top, axis=1).argsort(axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+
+            hit_rows = sorted({int(row_ids[j]) for j in top.ravel()})
+            loaded = self._load_rows(hit_rows, include)
+
+        result = {"ids": [], "distances": [], "metadatas": [], "documents": []}
+        for q in range(n_queries):
+            rows = [int(row_ids[j]) for j in top[q]]
+            result["ids"].append([self._ids[r] for r in rows])
+            result["distances"].append([max(float(dists[q, j]), 0.0) for j in top[q]])
+            result["metadatas"].append([loaded[r][2] for r in rows])
+            result["documents"].append([loaded[r][1] for r in rows])
+        return result
@@ -12,9 +12,17 @@ class Settings:
     OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
     CORS_ORIGINS: list = ["http://localhost:3000", "http://127.0.0.1:3000", "https://learnify-sable.vercel.app"] # Credentials require explicit origin, not *
     
+    # Startup warm-up of lazily created clients (see /ready); the canary also makes one
+    # cheap call per dependency (Supabase select, OpenAI models list, vector count, embedding)
+    WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    WARMUP_CANARY: bool = os.getenv("WARMUP_CANARY", "false").lower() == "true"
+    
     # Video Pipeline Configuration
     YOUTUBE_API_KEY: str = os.getenv("YOUTUBE_API_KEY", "")
     CHROMA_DB_PATH: str = os.getenv("CHROMA_DB_PATH", "./chroma_db")
+    # Vector store: chroma (CHROMA_DB_PATH) or numpy (in-process memmap index under VECTOR_STORE_PATH)
+    VECTOR_STORE: str = os.getenv("VECTOR_STORE", "chroma")
+    VECTOR_STORE_PATH: str = os.getenv("VECTOR_STORE_PATH", "./vector_store")
     
     # Pipeline Tunables
     MAX_CANDIDATES_PER_TOPIC: int = int(os.getenv("MAX_CANDIDATES_PER_TOPIC", "30"))
@@ -23,6 +31,64 @@ class Settings:
     SIMILARITY_THRESHOLD: float = float(os.getenv("SIMILARITY_THRESHOLD", "0.75"))
     MAX_CHUNK_DURATION_SECONDS: int = int(os.getenv("MAX_CHUNK_DURATION_SECONDS", "600"))
     CHUNK_SILENCE_THRESHOLD: float = float(os.getenv("CHUNK_SILENCE_THRESHOLD", "2.0"))
+    # Narrow vector scoring to candidates whose transcript shares a keyword with the lesson specs
+    KEYWORD_PREFILTER: bool = os.getenv("KEYWORD_PREFILTER", "true").lower() == "true"
+    # Lesson -> video assignment: max lessons per video (soft: lifted when the pool runs out), score penalty per reuse of a channel
+    MAX_VIDEO_REUSE: int = int(os.getenv("MAX_VIDEO_REUSE", "2"))
+    CHANNEL_DIVERSITY_PENALTY: float = float(os.getenv("CHANNEL_DIVERSITY_PENALTY", "0.15"))
+
+    # In-process yt-dlp worker pool size (each worker keeps its own warm YoutubeDL)
+    YTDLP_WORKERS: int = int(os.getenv("YTDLP_WORKERS", "4"))
+    # Search backend: ytdlp (live), fixture (recorded results from SEARCH_FIXTURES_DIR, offline)
+    # or record (live, and writes every search into SEARCH_FIXTURES_DIR)
+    SEARCH_PROVIDER: str = os.getenv("SEARCH_PROVIDER", "ytdlp")
+    SEARCH_FIXTURES_DIR: str = os.getenv("SEARCH_FIXTURES_DIR", "./fixtures/search")
+    # Hard cap on a single search
+    SEARCH_TIMEOUT_SECONDS: float = float(os.getenv("SEARCH_TIMEOUT_SECONDS", "30"))
+
+    # Roadmap enrichment: per-lesson searches fan out on a pool under one global deadline
+    ROADMAP_SEARCH_WORKERS: int = int(os.getenv("ROADMAP_SEARCH_WORKERS", "8"))
+    ROADMAP_SEARCH_DEADLINE_SECONDS: float = float(os.getenv("ROADMAP_SEARCH_DEADLINE_SECONDS", "20"))
+
+    # Local Caches (SQLite files under CACHE_DIR)
+    CACHE_DIR: str = os.getenv("CACHE_DIR", "./.cache")
+    SEARCH_CACHE_TTL_SECONDS: int = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", str(24 * 3600)))
+    SEARCH_CACHE_MAX_ENTRIES: int = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000"))
+    VIDEO_META_TTL_SECONDS: int = int(os.getenv("VIDEO_META_TTL_SECONDS", str(7 * 24 * 3600)))
+    VIDEO_META_CACHE_MAX_ENTRIES: int = int(os.getenv("VIDEO_META_CACHE_MAX_ENTRIES", "50000"))
+    LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+    # Embedding vectors (~6 KB each for text-embedding-3-small); keyed by model, so no staleness
+    EMBEDDING_CACHE_TTL_SECONDS: int = int(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", str(90 * 24 * 3600)))
+    EMBEDDING_CACHE_MAX_ENTRIES: int = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
+    # Embedding backend: openai (text-embedding-3-small) or local (hashed n-grams on CPU,
+    # no network or API key; separate Chroma collection)
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "openai")
+    LOCAL_EMBEDDING_DIM: int = int(os.getenv("LOCAL_EMBEDDING_DIM", "512"))
+    # Upstream embedding requests: estimated-token budget and input cap per request,
+    # requests in flight, retries with exponential backoff (base seconds)
+    EMBEDDING_BATCH_MAX_TOKENS: int = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "100000"))
+    EMBEDDING_BATCH_MAX_ITEMS: int = int(os.getenv("EMBEDDING_BATCH_MAX_ITEMS", "512"))
+    EMBEDDING_CONCURRENCY: int = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+    EMBEDDING_MAX_RETRIES: int = int(os.getenv("EMBEDDING_MAX_RETRIES", "4"))
+    EMBEDDING_RETRY_BACKOFF_SECONDS: float = float(os.getenv("EMBEDDING_RETRY_BACKOFF_SECONDS", "1.0"))
+    # Transcripts (zlib-compressed) by video + language; caption-less videos are remembered for a day
+    TRANSCRIPT_LANGUAGE: str = os.getenv("TRANSCRIPT_LANGUAGE", "en")
+    TRANSCRIPT_CACHE_TTL_SECONDS: int = int(os.getenv("TRANSCRIPT_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+    TRANSCRIPT_NEGATIVE_TTL_SECONDS: int = int(os.getenv("TRANSCRIPT_NEGATIVE_TTL_SECONDS", str(24 * 3600)))
+    TRANSCRIPT_CACHE_MAX_ENTRIES: int = int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", "20000"))
+    # Decoded transcripts kept in memory for /transcripts, and its browser/CDN cache lifetime
+    TRANSCRIPT_MEMORY_CACHE_SIZE: int = int(os.getenv("TRANSCRIPT_MEMORY_CACHE_SIZE", "64"))
+    TRANSCRIPT_HTTP_MAX_AGE_SECONDS: int = int(os.getenv("TRANSCRIPT_HTTP_MAX_AGE_SECONDS", "3600"))
+    # Upstream transcript fetches: process-wide rate (per second, 0 = unlimited) and burst,
+    # and how many a course post-processing job runs at once
+    TRANSCRIPT_FETCH_RATE: float = float(os.getenv("TRANSCRIPT_FETCH_RATE", "2"))
+    TRANSCRIPT_FETCH_BURST: int = int(os.getenv("TRANSCRIPT_FETCH_BURST", "4"))
+    TRANSCRIPT_FETCH_WORKERS: int = int(os.getenv("TRANSCRIPT_FETCH_WORKERS", "8"))
+    # Search hits are enriched with full details in batches of this size, after the search,
+    # under their own overall budget (separate from SEARCH_TIMEOUT_SECONDS)
+    VIDEO_DETAILS_BATCH_SIZE: int = int(os.getenv("VIDEO_DETAILS_BATCH_SIZE", "8"))
+    VIDEO_DETAILS_TIMEOUT_SECONDS: float = float(os.getenv("VIDEO_DETAILS_TIMEOUT_SECONDS", "60"))
 
 settings = Settings()
 
@@ -0,0 +1,92 @@
+import asyncio
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PENDING, WARMING, READY, FAILED = "pending", "warming", "ready", "failed"
+
+def _warm_supabase(canary: bool):
+    from app.core.database import SupabaseClient
+    client = SupabaseClient.get_client()
+    if canary:
+        client.table("courses").select("id").limit(1).execute()
+
+def _warm_openai(canary: bool):
+    from app.ai.roadmap_generator import get_openai_client
+    client = get_openai_client()
+    if canary:
+        # Cheapest authenticated call; leaves a warm pooled TLS connection behind
+        client.models.list()
+
+def _warm_vector_store(canary: bool):
+    from app.ai.embeddings import get_vector_collection
+    collection = get_vector_collection()
+    if canary:
+        collection.count()
+
+def _warm_embeddings(canary: bool):
+    from app.ai.embeddings import get_embedding_function
+    embed = get_embedding_function()
+    if canary:
+        # Served from the embedding cache after the first deploy
+        embed(["warmup canary"])
+
+class Warmup:
+    """
+    Initializes the lazily created clients concurrently at startup (each in a worker
+    thread), optionally running a canary call per dependency (WARMUP_CANARY), and keeps
+    per-dependency status and init timings for /ready.
+    """
+    def __init__(self, steps: List[Tuple[str, Callable[[bool], Any]]]):
+        self.steps = steps
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.dependencies: Dict[str, Dict[str, Any]] = {
+            name: {"status": PENDING, "seconds": None, "error": None} for name, _ in steps
+        }
+
+    async def run(self, canary: bool = False):
+        self.started_at = time.time()
+        await asyncio.gather(*(self._run_step(name, fn, canary) for name, fn in self.steps))
+        self.finished_at = time.time()
+        logger.info(f"Warm-up finished in {self.finished_at - self.started_at:.2f}s: {self.summary()}")
+
+    async def _run_step(self, name: str, fn: Callable[[bool], Any], canary: bool):
+        state = self.dependencies[name]
+        state["status"] = WARMING
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(fn, canary)
+            state["status"] = READY
+        except Exception as e:
+            # A failed warm-up leaves lazy init to the first request; /ready reports it
+            logger.warning(f"Warm-up of {name} failed: {e}")
+            state["status"] = FAILED
+            state["error"] = str(e)
+        state["seconds"] = round(time.perf_counter() - start, 4)
+
+    @property
+    def ready(self) -> bool:
+        return all(dep["status"] == READY for dep in self.dependencies.values())
+
+    def summary(self) -> Dict[str, str]:
+        return {name: dep["status"] for name, dep in self.dependencies.items()}
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "status": "ready" if self.ready else "not_ready",
+            "warmup_seconds": (
+                round(self.finished_at - self.started_at, 4)
+                if self.started_at and self.finished_at else None
+            ),
+            "dependencies": self.dependencies,
+        }
+
+warmup = Warmup([
+    ("supabase", _warm_supabase),
+    ("openai", _warm_openai),
+    ("vector_store", _warm_vector_store),
+    ("embeddings", _warm_embeddings),
+])
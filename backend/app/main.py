@@ -1,7 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.config import settings
+from app.core.warmup import warmup
 from app.routers import courses, roadmap, progress
+import asyncio
 import logging
 
 # Configure logging
@@ -10,6 +13,9 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI(title=settings.PROJECT_NAME)
 
+# Keeps the background warm-up task referenced for the lifetime of the app
+_warmup_task = None
+
 @app.on_event("startup")
 async def startup_event():
     """Log startup information"""
@@ -19,6 +25,12 @@ async def startup_event():
     logger.info(f"Supabase URL configured: {bool(settings.SUPABASE_URL)}")
     logger.info(f"OpenAI API configured: {bool(settings.OPENAI_API_KEY)}")
     logger.info("=" * 50)
+    
+    # Warm clients in the background so /health (Railway) answers immediately;
+    # /ready tells when the first real request won't pay for initialization
+    global _warmup_task
+    if settings.WARMUP_ENABLED:
+        _warmup_task = asyncio.create_task(warmup.run(canary=settings.WARMUP_CANARY))
 
 # CORS middleware - must be added before routes
 app.add_middleware(
@@ -46,6 +58,28 @@ def read_root():
 def health_check():
     return {"status": "ok", "port": "Railway managed"}
 
+@app.get("/ready")
+def readiness_check():
+    """
+    Per-dependency warm-up status and init timings; 503 until every client is warm
+    (always 200 when WARMUP_ENABLED is off, since nothing will warm them ahead of time).
+    """
+    from app.utils.yt_api import search_cache, video_meta_cache
+    from app.ai.llm_client import llm_cache
+    from app.ai.embeddings import embedding_cache
+    from app.utils.transcript_store import transcript_store
+    
+    report = warmup.report()
+    report["caches"] = {
+        "search": search_cache.stats(),
+        "video_meta": video_meta_cache.stats(),
+        "llm": llm_cache.stats(),
+        "embeddings": embedding_cache.stats(),
+        "transcripts": transcript_store.stats(),
+    }
+    ready = warmup.ready or not settings.WARMUP_ENABLED
+    return JSONResponse(report, status_code=200 if ready else 503)
+
 app.include_router(roadmap.router, prefix="/roadmap", tags=["roadmap"])
 app.include_router(courses.router, prefix="/courses", tags=["courses"])
 app.include_router(progress.router, prefix="/progress", tags=["progress"])
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException
+import asyncio
 from app.schemas.course import GenerateRoadmapRequest
 from app.services.roadmap_service import roadmap_service
 
@@ -7,7 +8,9 @@ router = APIRouter()
 @router.post("/generate")
 async def generate_roadmap_endpoint(request: GenerateRoadmapRequest):
     try:
-        roadmap = roadmap_service.create_structured_roadmap(
+        # Off the event loop, so concurrent requests can overlap (and coalesce)
+        roadmap = await asyncio.to_thread(
+            roadmap_service.create_structured_roadmap,
             request.topic, 
             request.level,
             request.language
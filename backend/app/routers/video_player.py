@@ -1,5 +1,11 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
+from typing import Optional
+from app.core.config import settings
+from app.utils.transcript_store import transcript_store
+from app.utils.transcript_index import transcript_index
+import asyncio
 
 router = APIRouter()
 
@@ -18,11 +24,67 @@ async def generate_summary_stub(req: VideoRequest):
         "key_concepts": ["Video Only"]
     }
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison is what If-None-Match specifies
+    return "*" in candidates or etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+# Declared before /transcripts/{video_id} so "search" isn't taken for a video id
+@router.get("/transcripts/search")
+async def search_transcripts(
+    q: str = Query(..., min_length=1, description="Words to find (all must occur)"),
+    course_id: Optional[str] = None,
+    lesson_id: Optional[str] = None,
+    video_id: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Full-text search over fetched transcripts (local FTS index, no network), scoped to a
+    course, lesson or video. Hits carry start/end seconds for "jump to where they say X".
+    """
+    hits = await asyncio.to_thread(
+        transcript_index.search, q, course_id=course_id, lesson_id=lesson_id, video_id=video_id, limit=limit
+    )
+    return {"query": q, "hits": hits}
+
 @router.get("/transcripts/{video_id}")
-async def get_transcript_stub(video_id: str):
-    # STUB: Returns mock transcript to satisfy frontend
-    return {
-        "transcript": "Transcripts are disabled in Strict Video Mode. Please watch the video.",
-        "source": "disabled",
-        "videoId": video_id
+async def get_transcript(
+    video_id: str,
+    request: Request,
+    start: Optional[float] = Query(None, ge=0, description="Window start (seconds)"),
+    end: Optional[float] = Query(None, ge=0, description="Window end (seconds, exclusive)"),
+):
+    """
+    Transcript of a video, optionally only the segments overlapping [start, end).
+    Parallel arrays (start, duration, text) plus `transcript` (the window's text) for the player.
+    Hot videos are answered from the in-memory LRU without leaving the event loop; the
+    strong ETag (content hash + window) makes caption-window polls a 304 with no body.
+    """
+    transcript = transcript_store.get_in_memory(video_id)
+    if transcript is None:
+        # Disk store or YouTube: keep it off the event loop
+        transcript = await asyncio.to_thread(transcript_store.get, video_id)
+    if transcript is None:
+        raise HTTPException(status_code=404, detail="Transcript unavailable for this video.")
+    
+    lo, hi = transcript.index_range(start, end)
+    etag = f'"{transcript.digest()}-{lo}-{hi}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.TRANSCRIPT_HTTP_MAX_AGE_SECONDS}",
     }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    window = transcript.slice_indices(lo, hi)
+    return JSONResponse(
+        {
+            "videoId": video_id,
+            "source": "youtube_captions",
+            **window.to_dict(),
+            "transcript": window.full_text,
+        },
+        headers=headers
+    )
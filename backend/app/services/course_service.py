@@ -1,8 +1,15 @@
 from app.core.database import supabase
 from app.schemas.course import CourseCreate
 from app.core.config import settings
+from app.utils.transcript_index import transcript_index
 from supabase import create_client, Client
 import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# Transcript fetch workers shared by all course post-processing jobs (the default
+# asyncio executor is sized by CPU count, far below what network-bound fetches want)
+_transcript_pool = ThreadPoolExecutor(max_workers=settings.TRANSCRIPT_FETCH_WORKERS, thread_name_prefix="transcripts")
 
 class CourseService:
     @staticmethod
@@ -60,7 +67,9 @@ class CourseService:
             
             if lessons_payload:
                 try:
-                    client.table("lessons").insert(lessons_payload).execute()
+                    inserted = client.table("lessons").insert(lessons_payload).execute().data or []
+                    # Course/lesson-scoped transcript search needs the new lesson ids
+                    transcript_index.link_lessons(course_id, [(row.get("id"), row.get("video_id")) for row in inserted])
                 except Exception as e:
                     print(f"Error inserting lessons: {e}")
                     # Don't fail the whole course creation if lessons fail? 
@@ -98,10 +107,17 @@ class CourseService:
     async def process_course_content(course_id: str):
         """
         Background task to fetch transcripts and generate embeddings for a new course.
+        Runs as a worker stage: transcript fetches go to a shared pool of
+        TRANSCRIPT_FETCH_WORKERS threads (under the shared transcript rate limiter),
+        then transcript text writes (once per video, only that column) and one batched
+        embedding pass for all lessons.
+        Blocking calls never run on the event loop.
         """
         print(f"DEBUG: Starting background content processing for course {course_id}")
         # Fetch lessons
-        response = supabase.table("lessons").select("*").eq("course_id", course_id).execute()
+        response = await asyncio.to_thread(
+            lambda: supabase.table("lessons").select("id, video_id, transcript_text").eq("course_id", course_id).execute()
+        )
         lessons = response.data
         
         if not lessons:
@@ -111,23 +127,61 @@ class CourseService:
         from app.services.transcript_service import transcript_service
         from app.ai.embeddings import embedding_service
         
+        # Lessons sharing a video share one transcript fetch
+        lessons_by_video = {}
         for lesson in lessons:
-            video_id = lesson.get("video_id")
-            if video_id:
-                # 1. Fetch Transcript
-                print(f"DEBUG: Fetching transcript for video {video_id} (Lesson {lesson['id']})")
-                transcript_list = transcript_service.fetch_transcript(video_id)
-                
-                if transcript_list:
-                    full_text = transcript_service.get_full_text(transcript_list)
-                    
-                    # 2. Save Transcript to DB
-                    supabase.table("lessons").update({"transcript_text": full_text}).eq("id", lesson["id"]).execute()
-                    
-                    # 3. Generate Embeddings (Chroma)
-                    print(f"DEBUG: generating embeddings for lesson {lesson['id']}")
-                    embedding_service.add_transcript_chunks(lesson["id"], full_text)
-                else:
-                    print(f"DEBUG: No transcript available for video {video_id}")
+            if lesson.get("video_id"):
+                lessons_by_video.setdefault(lesson["video_id"], []).append(lesson)
+        
+        # 1. Fetch Transcripts concurrently (local transcript store first)
+        loop = asyncio.get_running_loop()
+        video_ids = list(lessons_by_video)
+        transcripts = await asyncio.gather(
+            *(loop.run_in_executor(_transcript_pool, transcript_service.fetch_transcript, v) for v in video_ids),
+            return_exceptions=True
+        )
+        
+        text_updates = {} # lesson_id -> transcript text
+        lesson_texts = []
+        indexed = []
+        for video_id, transcript in zip(video_ids, transcripts):
+            if isinstance(transcript, Exception) or not transcript:
+                print(f"DEBUG: No transcript available for video {video_id}")
+                continue
+            indexed.append((video_id, transcript))
+            full_text = transcript.full_text
+            video_lessons = lessons_by_video[video_id]
+            for lesson in video_lessons:
+                lesson_texts.append((lesson["id"], full_text))
+            # Stored once per video (on its first lesson), and only when not stored already
+            if not any(lesson.get("transcript_text") == full_text for lesson in video_lessons):
+                text_updates[video_lessons[0]["id"]] = full_text
+        
+        # Keyword index: transcripts from an older store may predate it (no-op when current),
+        # and course/lesson links make course-scoped transcript search possible
+        def index_course():
+            for video_id, transcript in indexed:
+                transcript_index.index_transcript(video_id, transcript)
+            transcript_index.link_lessons(course_id, [(l["id"], l.get("video_id")) for l in lessons])
+        await asyncio.to_thread(index_course)
+        
+        # 2. Save Transcripts to DB: only the text column, so concurrent edits to other columns survive
+        def save_text(lesson_id: str, text: str):
+            supabase.table("lessons").update({"transcript_text": text}).eq("id", lesson_id).execute()
+        saved = await asyncio.gather(
+            *(loop.run_in_executor(_transcript_pool, save_text, l_id, text) for l_id, text in text_updates.items()),
+            return_exceptions=True
+        )
+        for error in (r for r in saved if isinstance(r, Exception)):
+            print(f"Error saving transcripts for course {course_id}: {error}")
+        
+        # 3. Generate Embeddings for every lesson in batched calls
+        if lesson_texts:
+            print(f"DEBUG: generating embeddings for {len(lesson_texts)} lessons")
+            try:
+                count = await asyncio.to_thread(embedding_service.add_transcript_chunks_bulk, lesson_texts)
+                print(f"DEBUG: stored {count} chunks for course {course_id}")
+            except Exception as e:
+                print(f"Error generating embeddings for course {course_id}: {e}")
 
 course_service = CourseService()
@@ -1,5 +1,7 @@
+from concurrent.futures import ThreadPoolExecutor, wait
 from app.ai.roadmap_generator import generate_roadmap
 from app.services.video_service import video_service
+from app.core.config import settings
 
 class RoadmapService:
     @staticmethod
@@ -13,27 +15,57 @@ class RoadmapService:
             print(f"DEBUG: OpenAI Generation Failed: {e}")
             raise e
         
-        # 2. Enrich with YouTube videos (with timeout protection)
+        # 2. Enrich with YouTube videos (parallel, under one global deadline)
         print(f"Enriching roadmap for {topic}...")
+        RoadmapService._attach_videos(roadmap_json, language)
+        
+        return roadmap_json
+
+    @staticmethod
+    def _attach_videos(roadmap_json: dict, language: str):
+        """
+        Searches a video for every lesson concurrently on a bounded pool.
+        Whatever comes back before the deadline is attached; slower searches are dropped
+        so the request scales with the slowest search rather than the sum of all of them.
+        """
+        jobs = []
         for module in roadmap_json.get("modules", []):
             for lesson in module.get("lessons", []):
                 query = lesson.get("video_query")
                 if query:
-                    # Search logic with timeout
-                    search_q = f"{query} {language} educational"
-                    print(f"DEBUG: Searching video for: {search_q}")
-                    try:
-                        videos = video_service.search_video(search_q, limit=1)
-                        if videos:
-                            lesson["video"] = videos[0]
-                            print(f"✅ Attached video: {videos[0]['title'][:50]}")
-                        else:
-                            print(f"⚠️ No video found for: {search_q}")
-                    except Exception as e:
-                        print(f"⚠️ Video Search Failed for '{search_q}': {e}")
-                        # Continue without video - don't fail the whole request
-                        continue
+                    jobs.append((lesson, f"{query} {language} educational"))
+        if not jobs:
+            return
+
+        deadline = settings.ROADMAP_SEARCH_DEADLINE_SECONDS
+        executor = ThreadPoolExecutor(
+            max_workers=min(settings.ROADMAP_SEARCH_WORKERS, len(jobs)),
+            thread_name_prefix="roadmap-search"
+        )
+        futures = []
+        for lesson, search_q in jobs:
+            print(f"DEBUG: Searching video for: {search_q}")
+            futures.append(executor.submit(video_service.search_video, search_q, 1, deadline))
         
-        return roadmap_json
+        done, not_done = wait(futures, timeout=deadline)
+        # Don't block the request on stragglers; queued searches are cancelled
+        executor.shutdown(wait=False, cancel_futures=True)
+        
+        # Walk in lesson order so logs and results line up with the roadmap
+        for (lesson, search_q), future in zip(jobs, futures):
+            if future not in done:
+                print(f"⚠️ Video search missed deadline for: {search_q}")
+                continue
+            try:
+                videos = future.result()
+                if videos:
+                    lesson["video"] = videos[0]
+                    print(f"✅ Attached video: {videos[0]['title'][:50]}")
+                else:
+                    print(f"⚠️ No video found for: {search_q}")
+            except Exception as e:
+                print(f"⚠️ Video Search Failed for '{search_q}': {e}")
+                # Continue without video - don't fail the whole request
+                continue
 
 roadmap_service = RoadmapService()
@@ -1,20 +1,17 @@
-from youtube_transcript_api import YouTubeTranscriptApi
+from app.utils.compact_transcript import TranscriptLike, as_compact
+from app.utils.transcript_store import transcript_store
 
 class TranscriptService:
     @staticmethod
-    def fetch_transcript(video_id: str):
-        try:
-            transcript = YouTubeTranscriptApi.get_transcript(video_id)
-            # Return raw list of dicts: [{text, start, duration}]
-            return transcript 
-        except Exception as e:
-            print(f"Error fetching transcript: {e}")
-            return None
+    def fetch_transcript(video_id: str, language: str = None):
+        # Read-through the local transcript store (compressed, TTL, remembers caption-less videos)
+        # Compact form: float arrays + one text buffer (iterates as {text, start, duration})
+        return transcript_store.get(video_id, language)
 
     @staticmethod
-    def get_full_text(transcript: list):
+    def get_full_text(transcript: TranscriptLike):
         if not transcript:
             return ""
-        return " ".join([t['text'] for t in transcript])
+        return as_compact(transcript).full_text
 
 transcript_service = TranscriptService()
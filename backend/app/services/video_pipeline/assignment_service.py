@@ -0,0 +1,80 @@
+from typing import List, Optional
+from app.core.config import settings
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AssignmentService:
+    """
+    Assigns videos to lessons for a whole course at once from a lessons x candidates
+    relevance matrix, instead of each lesson independently taking its top candidate
+    (which lets one broad video win most of the course).
+    """
+    def __init__(self):
+        self.max_reuse = settings.MAX_VIDEO_REUSE
+        self.channel_penalty = settings.CHANNEL_DIVERSITY_PENALTY
+
+    def assign(self, scores: np.ndarray, channel_ids: List[str]) -> List[Optional[int]]:
+        """
+        Greedy global assignment: repeatedly commits the best remaining (lesson, video) pair.
+        - a video can serve at most `max_reuse` lessons
+        - every lesson already given to a channel lowers that channel's other videos by `channel_penalty`
+        The reuse cap is soft: lessons it leaves without a video (small pools) get a second,
+        uncapped pass, so every lesson with any finite score still gets a video.
+        Returns the chosen column per row, or None where a row has no finite score.
+        """
+        n_lessons, n_candidates = scores.shape
+        result: List[Optional[int]] = [None] * n_lessons
+        if n_lessons == 0 or n_candidates == 0:
+            return result
+
+        scores = scores.astype(np.float64, copy=False)
+        reuse = np.zeros(n_candidates, dtype=np.int64)
+        channels = np.array(channel_ids, dtype=object)
+
+        self._greedy(scores, channels, result, reuse, self.max_reuse)
+        if any(r is None for r in result):
+            self._greedy(scores, channels, result, reuse, None)
+
+        assigned = sum(1 for r in result if r is not None)
+        logger.info(f"Assigned {assigned}/{n_lessons} lessons across {len(set(r for r in result if r is not None))} videos.")
+        return result
+
+    def _greedy(
+        self,
+        scores: np.ndarray,
+        channels: np.ndarray,
+        result: List[Optional[int]],
+        reuse: np.ndarray,
+        max_reuse: Optional[int],
+    ):
+        """One greedy pass over the rows of `result` still unassigned, updating `result` and `reuse` in place."""
+        working = scores.copy()
+        for lesson, cand in enumerate(result):
+            if cand is not None:
+                working[lesson, :] = -np.inf
+        if max_reuse is not None:
+            working[:, reuse >= max_reuse] = -np.inf
+        if self.channel_penalty:
+            # Channels already used by earlier picks keep their penalty
+            for cand in (c for c in result if c is not None):
+                if channels[cand]:
+                    working[:, channels == channels[cand]] -= self.channel_penalty
+
+        for _ in range(sum(1 for r in result if r is None)):
+            lesson, cand = divmod(int(np.argmax(working)), working.shape[1])
+            if not np.isfinite(working[lesson, cand]):
+                break
+
+            result[lesson] = cand
+            working[lesson, :] = -np.inf
+
+            reuse[cand] += 1
+            if max_reuse is not None and reuse[cand] >= max_reuse:
+                working[:, cand] = -np.inf
+
+            if self.channel_penalty and channels[cand]:
+                working[:, channels == channels[cand]] -= self.channel_penalty
+
+assignment_service = AssignmentService()
@@ -28,8 +28,7 @@ class TranscriptChunk(BaseModel):
     start_time: float
     end_time: float
     text: str
-    embedding_id: Optional[str] = None
-    embedding: Optional[List[float]] = None # Optional, might not store in memory always
+    embedding_id: Optional[str] = None # Vectors live in the vector store only, never on the chunk
 
 class LessonPlan(BaseModel):
     """Derived from roadmap"""
@@ -0,0 +1,50 @@
+from typing import List
+import numpy as np
+from .base import VideoCandidate
+
+def meta_scores(views: np.ndarray, likes: np.ndarray, durations: np.ndarray) -> np.ndarray:
+    """
+    Vectorized meta score (popularity, like ratio, duration fit) for many videos at once.
+    Single source of truth for VideoShortlistService._compute_meta_score.
+    """
+    # 1. View Score (Log scale): log10(1M) = 6 counts as maxed out for ed content
+    view_score = np.minimum(np.log10(views + 1) / 6.0, 1.0)
+
+    # 2. Like Ratio: >= 5% of views scores 1
+    like_score = np.minimum((likes / (views + 1)) * 20, 1.0)
+
+    # 3. Duration Score: prefer 5-20 mins (300 - 1200s)
+    dur_score = np.select(
+        [
+            (durations >= 300) & (durations <= 1200),
+            (durations >= 120) & (durations < 300),
+            (durations > 1200) & (durations <= 3600), # up to 1h
+        ],
+        [1.0, 0.7, 0.6],
+        default=0.3
+    )
+
+    return (view_score * 0.4) + (like_score * 0.3) + (dur_score * 0.3)
+
+class CandidateBatch:
+    """
+    Columnar view of a candidate list: one NumPy array per numeric field, row i = candidates[i].
+    Lets scoring and constraint checks run as array operations over the whole pool.
+    """
+    def __init__(self, candidates: List[VideoCandidate]):
+        self.candidates = list(candidates)
+        self.views = np.array([c.view_count for c in self.candidates], dtype=np.float64)
+        self.likes = np.array([c.like_count for c in self.candidates], dtype=np.float64)
+        self.durations = np.array([c.duration_seconds for c in self.candidates], dtype=np.float64)
+        self.has_captions = np.array([c.has_captions for c in self.candidates], dtype=bool)
+        self.meta_scores = np.array([c.meta_score for c in self.candidates], dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def compute_meta_scores(self) -> np.ndarray:
+        """Recomputes meta scores for every row and writes them back onto the candidates."""
+        self.meta_scores = meta_scores(self.views, self.likes, self.durations)
+        for cand, score in zip(self.candidates, self.meta_scores.tolist()):
+            cand.meta_score = score
+        return self.meta_scores
@@ -1,83 +1,102 @@
-from typing import List, Dict, Any
-import uuid
+from typing import List, Dict, Any, Iterator, Optional
+import hashlib
 from .base import VideoCandidate, TranscriptChunk
 from app.core.config import settings
+from app.utils.compact_transcript import CompactTranscript, TranscriptLike, as_compact
 
 class ChunkingService:
     def __init__(self):
         self.target_word_count = 300
         self.max_duration = settings.MAX_CHUNK_DURATION_SECONDS
+        self.silence_threshold = settings.CHUNK_SILENCE_THRESHOLD
+        # Don't let every pause produce a sliver of a chunk
+        self.min_words_for_silence_split = self.target_word_count // 3
     
     def chunk_candidates(self, candidates: List[VideoCandidate]) -> Dict[str, List[TranscriptChunk]]:
         """
-        Returns a map of video_id -> list of chunks
+        Returns a map of video_id -> list of chunks.
+        Prefer iter_candidate_chunks when the chunks are only passed on (e.g. to embedding).
         """
         all_chunks = {}
-        
+        for chunk in self.iter_candidate_chunks(candidates):
+            all_chunks.setdefault(chunk.video_id, []).append(chunk)
+        return all_chunks
+
+    def iter_candidate_chunks(self, candidates: List[VideoCandidate]) -> Iterator[TranscriptChunk]:
+        """Streams chunks of every shortlisted candidate with a transcript, one video after another."""
         for cand in candidates:
             if not cand.is_shortlisted or not getattr(cand, 'raw_transcript', None):
                 continue
-                
-            chunks = self._chunk_transcript(cand.video_id, cand.raw_transcript)
-            all_chunks[cand.video_id] = chunks
-            
-        return all_chunks
+            yield from self.iter_chunks(cand.video_id, cand.raw_transcript)
+
+    def _chunk_transcript(self, video_id: str, raw_transcript: TranscriptLike) -> List[TranscriptChunk]:
+        return list(self.iter_chunks(video_id, raw_transcript))
 
-    def _chunk_transcript(self, video_id: str, raw_transcript: List[Dict]) -> List[TranscriptChunk]:
+    def iter_chunks(self, video_id: str, raw_transcript: TranscriptLike) -> Iterator[TranscriptChunk]:
         """
-        Basic algorithm: Accumulate lines until word count > target or duration > max.
+        Single pass over the transcript with running word/duration counters.
+        A chunk is closed before a line when it already holds the target word count,
+        when adding the line would reach MAX_CHUNK_DURATION_SECONDS, or when the line
+        follows a silence gap of at least CHUNK_SILENCE_THRESHOLD (once the chunk
+        has a reasonable amount of text).
+        Chunk text is a slice of the transcript's text buffer, not a join of its lines.
         """
-        chunks = []
-        current_words = []
-        current_start = None
-        current_end = 0
+        transcript = as_compact(raw_transcript)
+        starts, durations = transcript.starts, transcript.durations
+        first = 0
+        current_words = 0
+        current_start = 0.0
+        current_end = 0.0
         
-        for entry in raw_transcript:
-            text = entry['text']
-            start = entry['start']
-            duration = entry['duration']
-            end = start + duration
-            
-            if current_start is None:
-                current_start = start
+        for i in range(len(transcript)):
+            start = starts[i]
+            end = start + durations[i]
             
-            # Check conditions to split
-            # 1. Word count limit
-            current_word_count = len(" ".join(current_words).split())
-            # 2. Max duration limit
-            current_duration = end - current_start
+            if i > first:
+                gap = start - current_end
+                if (
+                    current_words >= self.target_word_count
+                    or (end - current_start) >= self.max_duration
+                    or (gap >= self.silence_threshold and current_words >= self.min_words_for_silence_split)
+                ):
+                    chunk = self._make_chunk(video_id, current_start, current_end, transcript, first, i)
+                    if chunk:
+                        yield chunk
+                    first = i
+                    current_words = 0
             
-            if (current_word_count >= self.target_word_count) or (current_duration >= self.max_duration):
-                # Close chunk
-                chunk_text = " ".join(current_words)
-                if chunk_text.strip():
-                    chunks.append(TranscriptChunk(
-                        chunk_id=str(uuid.uuid4()),
-                        video_id=video_id,
-                        start_time=current_start,
-                        end_time=current_end, # End of previous segment
-                        text=chunk_text
-                    ))
-                
-                # Reset
-                current_words = [text]
+            if i == first:
                 current_start = start
-            else:
-                current_words.append(text)
-            
+            current_words += len(transcript.text_at(i).split())
             current_end = end
         
         # Add last chunk
-        if current_words:
-            chunk_text = " ".join(current_words)
-            chunks.append(TranscriptChunk(
-                chunk_id=str(uuid.uuid4()),
-                video_id=video_id,
-                start_time=current_start or 0.0,
-                end_time=current_end,
-                text=chunk_text
-            ))
-            
-        return chunks
+        if first < len(transcript):
+            chunk = self._make_chunk(video_id, current_start, current_end, transcript, first, len(transcript))
+            if chunk:
+                yield chunk
+
+    @staticmethod
+    def chunk_id(video_id: str, start: float, end: float, text: str) -> str:
+        """
+        Content-addressed ID: same video, time span and text always give the same ID,
+        so re-runs upsert onto existing vectors and embedding can skip them.
+        """
+        text_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+        return f"{video_id}_{int(round(start * 1000))}_{int(round(end * 1000))}_{text_hash}"
+
+    def _make_chunk(
+        self, video_id: str, start: float, end: float, transcript: CompactTranscript, lo: int, hi: int
+    ) -> Optional[TranscriptChunk]:
+        chunk_text = transcript.text_range(lo, hi)
+        if not chunk_text.strip():
+            return None
+        return TranscriptChunk(
+            chunk_id=self.chunk_id(video_id, start, end, chunk_text),
+            video_id=video_id,
+            start_time=start,
+            end_time=end,
+            text=chunk_text
+        )
 
 chunking_service = ChunkingService()
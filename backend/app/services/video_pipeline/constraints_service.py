@@ -1,6 +1,8 @@
 from typing import List
 from app.core.config import settings
 from .base import VideoCandidate
+from .candidate_batch import CandidateBatch
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,26 +18,30 @@ class ConstraintsService:
         Filter out candidates that don't meet hard constraints.
         Updates is_shortlisted flag and rejection_reason.
         """
-        valid_candidates = []
+        if not candidates:
+            return []
         
-        for cand in candidates:
-            reason = None
-            
-            # 1. Duration
-            if cand.duration_seconds < self.min_duration:
-                reason = "Too short"
-            elif cand.duration_seconds > self.max_duration:
-                reason = "Too long"
-                
-            # 2. Views
-            if not reason and cand.view_count < self.min_views:
-                reason = "Too few views"
-                
-            # 3. Captions (Strict for pipeline, though we can auto-generate via whisper later)
-            # For now, we don't strictly reject on has_captions metadata 
-            # because YouTube API often reports false even if auto-caps exist.
-            # We defer this to TranscriptService.
-            
+        # Evaluated column-wise over the whole batch
+        batch = CandidateBatch(candidates)
+        
+        # 1. Duration, 2. Views (first failing check wins)
+        reasons = np.select(
+            [
+                batch.durations < self.min_duration,
+                batch.durations > self.max_duration,
+                batch.views < self.min_views,
+            ],
+            ["Too short", "Too long", "Too few views"],
+            default=""
+        )
+        
+        # 3. Captions (Strict for pipeline, though we can auto-generate via whisper later)
+        # For now, we don't strictly reject on has_captions metadata 
+        # because YouTube API often reports false even if auto-caps exist.
+        # We defer this to TranscriptService.
+        
+        valid_candidates = []
+        for cand, reason in zip(candidates, reasons.tolist()):
             if reason:
                 cand.is_shortlisted = False
                 cand.rejection_reason = reason
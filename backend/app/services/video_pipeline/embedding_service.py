@@ -1,22 +1,41 @@
-from typing import List
+from typing import Dict, Iterable, List, Optional, Set
+from itertools import islice
 from .base import TranscriptChunk
-from app.ai.embeddings import get_chroma_collection
+from app.ai.embeddings import get_vector_collection, embed_texts
 from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Rows per Chroma write; keeps each upsert under the client's max batch size
+UPSERT_BATCH_SIZE = 1000
+
 class EmbeddingService:
-    def embed_and_store(self, chunks: List[TranscriptChunk]):
+    def embed_and_store(self, chunks: List[TranscriptChunk], prune_stale: bool = True):
         """
-        Embeds chunks using Chroma's internal embedding function (configured in app.ai.embeddings)
-        and stores them.
+        Embeds chunks through the cached embedding function (app.ai.embeddings.embed_texts,
+        which packs misses into token-budgeted batches and runs them concurrently), then
+        writes the precomputed vectors to Chroma in bulk.
+        Chunk IDs are content-addressed (see ChunkingService.chunk_id), so chunks already in
+        the collection are skipped and only new or changed ones are embedded.
+        `chunks` is taken as the complete chunk set of each video it contains: with
+        `prune_stale`, that video's stored chunks missing from it (an older transcript) are deleted.
         """
         if not chunks:
             return
             
         try:
-            collection = get_chroma_collection()
+            collection = get_vector_collection()
+            
+            # Drop duplicates within the batch, then anything already stored
+            unique = list({c.chunk_id: c for c in chunks}.values())
+            existing = set(collection.get(ids=[c.chunk_id for c in unique], include=[])["ids"])
+            chunks = [c for c in unique if c.chunk_id not in existing]
+            if not chunks:
+                logger.info(f"All {len(unique)} chunks already embedded, skipping.")
+                if prune_stale:
+                    self.prune_stale(self._ids_by_video(unique))
+                return
             
             # Prepare batch
             ids = [c.chunk_id for c in chunks]
@@ -30,40 +49,103 @@ class EmbeddingService:
                 for c in chunks
             ]
             
-            # Upsert
-            # Using upsert to handle re-runs
-            collection.upsert(
-                ids=ids,
-                documents=documents,
-                metadatas=metadatas
-            )
+            embeddings = embed_texts(documents)
+            
+            # Upsert (IDs are new at this point; upsert keeps concurrent re-runs safe)
+            for start in range(0, len(ids), UPSERT_BATCH_SIZE):
+                end = start + UPSERT_BATCH_SIZE
+                collection.upsert(
+                    ids=ids[start:end],
+                    documents=documents[start:end],
+                    embeddings=embeddings[start:end],
+                    metadatas=metadatas[start:end]
+                )
             
-            logger.info(f"Upserted {len(chunks)} chunks to Chroma.")
+            logger.info(f"Upserted {len(chunks)} chunks to Chroma ({len(existing)} unchanged skipped).")
+            
+            # Only once the new chunks are stored, so a failed run leaves the old ones in place
+            if prune_stale:
+                self.prune_stale(self._ids_by_video(unique))
             
         except Exception as e:
             logger.error(f"Error in embed_and_store: {e}")
             raise e
 
-    def query_similar_chunks(self, query_text: str, n_results: int = 5) -> List[dict]:
+    def embed_stream(self, chunks: Iterable[TranscriptChunk], batch_size: Optional[int] = None) -> int:
+        """
+        Consumes a chunk stream (e.g. ChunkingService.iter_candidate_chunks) in fixed-size
+        batches, so chunks are embedded as they are produced instead of after every
+        transcript has been chunked. Returns the number of chunks stored.
+        The default batch is large enough to keep every concurrent embedding request busy.
+        A video's chunks may span batches, so stale chunks are pruned once the stream ends.
+        """
+        batch_size = batch_size or settings.EMBEDDING_BATCH_MAX_ITEMS * settings.EMBEDDING_CONCURRENCY
+        stored = 0
+        seen: Dict[str, Set[str]] = {}
+        iterator = iter(chunks)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                self.prune_stale(seen)
+                return stored
+            self.embed_and_store(batch, prune_stale=False)
+            for video_id, ids in self._ids_by_video(batch).items():
+                seen.setdefault(video_id, set()).update(ids)
+            stored += len(batch)
+
+    @staticmethod
+    def _ids_by_video(chunks: Iterable[TranscriptChunk]) -> Dict[str, Set[str]]:
+        ids: Dict[str, Set[str]] = {}
+        for c in chunks:
+            ids.setdefault(c.video_id, set()).add(c.chunk_id)
+        return ids
+
+    def prune_stale(self, current_ids: Dict[str, Set[str]]):
+        """Deletes each video's stored chunks that aren't in its current chunk id set."""
+        if not current_ids:
+            return
+        collection = get_vector_collection()
+        stale: List[str] = []
+        for video_id, ids in current_ids.items():
+            stored = collection.get(where={"video_id": video_id}, include=[])["ids"]
+            stale.extend(i for i in stored if i not in ids)
+        for start in range(0, len(stale), UPSERT_BATCH_SIZE):
+            collection.delete(ids=stale[start:start + UPSERT_BATCH_SIZE])
+        if stale:
+            logger.info(f"Deleted {len(stale)} stale chunks of {len(current_ids)} videos.")
+
+    def query_similar_chunks(self, query_text: str, n_results: int = 5, where: Optional[dict] = None) -> List[dict]:
         """
         Search for similar chunks.
         Returns list of dicts with metadata + score + text.
+        `where` is a Chroma metadata filter, e.g. {"video_id": {"$in": [...]}}.
+        """
+        return self.query_similar_chunks_batch([query_text], n_results=n_results, where=where)[0]
+
+    def query_similar_chunks_batch(self, query_texts: List[str], n_results: int = 5, where: Optional[dict] = None) -> List[List[dict]]:
+        """
+        Multi-query variant: all queries go to Chroma in one `query` call.
+        Returns one result list per query text (same order), each shaped like query_similar_chunks.
         """
+        if not query_texts:
+            return []
         try:
-            collection = get_chroma_collection()
+            collection = get_vector_collection()
             results = collection.query(
-                query_texts=[query_text],
-                n_results=n_results
+                query_embeddings=embed_texts(query_texts),
+                n_results=n_results,
+                where=where
             )
             
             # Unpack results
             # Chroma returns lists of lists (one per query)
-            output = []
-            if results['ids']:
-                ids = results['ids'][0]
-                dists = results['distances'][0] if 'distances' in results else []
-                metas = results['metadatas'][0] if 'metadatas' in results else []
-                docs = results['documents'][0] if 'documents' in results else []
+            outputs = []
+            for q_idx in range(len(query_texts)):
+                output = []
+                ids = results['ids'][q_idx] if results['ids'] else []
+                dists = results['distances'][q_idx] if results.get('distances') else []
+                metas = results['metadatas'][q_idx] if results.get('metadatas') else []
+                docs = results['documents'][q_idx] if results.get('documents') else []
                 
                 for i in range(len(ids)):
                     output.append({
@@ -72,10 +154,11 @@ class EmbeddingService:
                         "metadata": metas[i] if i < len(metas) else {},
                         "text": docs[i] if i < len(docs) else ""
                     })
-            return output
+                outputs.append(output)
+            return outputs
 
         except Exception as e:
             logger.error(f"Error querying chunks: {e}")
-            return []
+            return [[] for _ in query_texts]
 
 embedding_service = EmbeddingService()
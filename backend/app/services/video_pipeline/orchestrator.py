@@ -4,6 +4,7 @@ import traceback
 import logging
 
 from app.services.video_pipeline.video_shortlist_service import shortlist_service
+from app.services.video_pipeline.assignment_service import assignment_service
 # All transcript/AI services removed for STRICT VIDEO MODE
 from app.services.video_pipeline.persistence_service import persistence_service
 from app.services.video_pipeline.base import LessonPlan
@@ -44,67 +45,68 @@ def run_assembly_pipeline_sync(course_id: str, job_id: str, force_rebuild: bool)
         
         # Structure: modules -> lessons
         modules = roadmap.get("modules", [])
-        total_lessons = sum(len(m.get("lessons", [])) for m in modules)
-        processed_count = 0
         
-        updated_modules = []
+        # Lessons that need a video (existing videos are kept unless force_rebuild)
+        pending = [
+            (m_idx, l_idx, lesson)
+            for m_idx, module in enumerate(modules)
+            for l_idx, lesson in enumerate(module.get("lessons", []))
+            if force_rebuild or not lesson.get("video_id")
+        ]
+        job_manager.add_log(job_id, f"Assigning videos to {len(pending)} lessons")
+        
+        # A. Score every pending lesson against every pool video in one matrix and
+        #    solve lesson -> video globally (per-video reuse cap, channel diversity)
+        assigned = {}
+        if video_pool and pending:
+            pool_index = shortlist_service.build_pool_index(video_pool)
+            score_matrix = shortlist_service.score_matrix(pool_index, [lesson.get("title") or "" for _, _, lesson in pending])
+            picks = assignment_service.assign(
+                score_matrix,
+                [c.channel_id or c.channel_title for c in pool_index.candidates]
+            )
+            for (m_idx, l_idx, _), pick in zip(pending, picks):
+                if pick is not None:
+                    assigned[(m_idx, l_idx)] = pool_index.candidates[pick]
         
+        # B. Write the solution back into the roadmap in one pass (order preserved)
+        updated_modules = []
         for m_idx, module in enumerate(modules):
             updated_lessons = []
             for l_idx, lesson in enumerate(module.get("lessons", [])):
                 lesson_title = lesson.get("title")
-                job_manager.add_log(job_id, f"Processing lesson: {lesson_title}")
                 
                 # Check if already has video (unless force_rebuild)
                 if not force_rebuild and lesson.get("video_id"):
                     updated_lessons.append(lesson)
-                    processed_count += 1
                     continue
                 
-                # STRICT VIDEO-ONLY PIPELINE
-                try:
-                    # A. Select from POOL
-                    if video_pool:
-                        candidates = shortlist_service.select_best_from_pool(video_pool, lesson_title)
-                    else:
-                        candidates = []
-
-                    if not candidates:
-                         # STRICT VIDEO MODE: if no video, SKIP lesson
-                         job_manager.add_log(job_id, f"⚠️ STRICT MODE: Skipping lesson '{lesson_title}' - No video candidates.")
-                         continue
-                    
-                    # B. Pick best video (already sorted by relevance)
-                    best = candidates[0]
-                    
-                    # C. Create minimal lesson node
-                    final_node = {
-                        "video_id": best.video_id,
-                        "videoId": best.video_id, # Frontend Compat: camelCase
-                        "title": best.title,
-                        "description": best.description or "",
-                        "duration": best.duration_seconds,
-                        "channel": best.channel_title,
-                    }
-                    job_manager.add_log(job_id, f"✅ Selected video '{best.title}' for lesson.")
-                    
-                    # D. Merge back into lesson object
-                    lesson.update(final_node)
-                    updated_lessons.append(lesson)
-                    
-                except Exception as e:
-                    logger.error(f"Error processing lesson {lesson_title}: {e}")
-                    traceback.print_exc()
-                    # Do not append lesson on error in strict mode
+                best = assigned.get((m_idx, l_idx))
+                if best is None:
+                    # STRICT VIDEO MODE: if no video, SKIP lesson
+                    job_manager.add_log(job_id, f"⚠️ STRICT MODE: Skipping lesson '{lesson_title}' - No video candidates.")
                     continue
-
-                processed_count += 1
-                progress_pct = int((processed_count / total_lessons) * 100) if total_lessons > 0 else 100
-                job_manager.update_status(job_id, JobStatus.RUNNING, progress={"percent": progress_pct})
+                
+                # C. Create minimal lesson node
+                final_node = {
+                    "video_id": best.video_id,
+                    "videoId": best.video_id, # Frontend Compat: camelCase
+                    "title": best.title,
+                    "description": best.description or "",
+                    "duration": best.duration_seconds,
+                    "channel": best.channel_title,
+                }
+                job_manager.add_log(job_id, f"✅ Selected video '{best.title}' for lesson '{lesson_title}'.")
+                
+                # D. Merge back into lesson object
+                lesson.update(final_node)
+                updated_lessons.append(lesson)
 
             # Update module
             module["lessons"] = updated_lessons
             updated_modules.append(module)
+        
+        job_manager.update_status(job_id, JobStatus.RUNNING, progress={"percent": 100})
             
         # I. Persist
         roadmap["modules"] = updated_modules
@@ -1,5 +1,6 @@
 from typing import Any, Dict
 from app.core.database import supabase
+from app.utils.transcript_index import transcript_index
 import json
 import logging
 
@@ -44,8 +45,12 @@ class PersistenceService:
                     lessons_payload.append(row)
                     order_idx += 1
             
+            inserted = []
             if lessons_payload:
-                supabase.table("lessons").insert(lessons_payload).execute()
+                inserted = supabase.table("lessons").insert(lessons_payload).execute().data or []
+            
+            # 3. Link the new lesson ids to their videos for course/lesson-scoped transcript search
+            transcript_index.link_lessons(course_id, [(row.get("id"), row.get("video_id")) for row in inserted])
                 
             logger.info(f"Persisted course {course_id} with {len(lessons_payload)} lessons.")
             
@@ -0,0 +1,129 @@
+from typing import Dict, List, Tuple
+import math
+import re
+import numpy as np
+from .base import VideoCandidate
+
+# Short English stop-word list; lesson titles and video titles are mostly nouns anyway
+STOP_WORDS = frozenset("""
+a an and are as at be but by for from how in into is it its of on or that the this to
+vs what when where which who why will with your you we our i me my do does part full
+course tutorial lesson video introduction intro beginners beginner guide learn learning
+""".split())
+
+# Keeps tokens like c++, c#, node.js -> "node", "js"
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+# First match wins; "es" is only a plural ending after sibilants (classes, boxes, matches)
+_SUFFIXES = (
+    ("sses", "ss"), ("ies", "y"), ("xes", "x"), ("ches", "ch"), ("shes", "sh"), ("zes", "z"),
+    ("ing", ""), ("ed", ""), ("ly", ""), ("s", ""),
+)
+
+def stem(token: str) -> str:
+    """
+    Light suffix stripping so 'loops'/'looping'/'looped' and 'variable'/'variables' share
+    a posting. A final 'e' is dropped too, so 'code'/'coded'/'coding' meet. Not a full Porter stemmer.
+    """
+    if not token.isalpha() or token.endswith("ss"):
+        return token
+    for suffix, replacement in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[: len(token) - len(suffix)] + replacement
+            break
+    if token.endswith("e") and len(token) >= 4:
+        token = token[:-1]
+    return token
+
+def keywords(text: str) -> List[str]:
+    """Content words of `text`, unstemmed (for indexes that stem themselves, e.g. FTS5 porter)."""
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in STOP_WORDS]
+
+def tokenize(text: str) -> List[str]:
+    return [stem(t) for t in keywords(text)]
+
+class PoolIndex:
+    """
+    BM25 index over one candidate pool, built once per assembly job and queried per lesson.
+    Title and description are scored as one document with per-field term weights (BM25F-style),
+    so a rare term in the title outweighs several common ones in the description.
+    """
+    TITLE_WEIGHT = 2.0
+    DESCRIPTION_WEIGHT = 0.5
+    META_WEIGHT = 0.5 # meta_score only separates otherwise equal matches
+
+    def __init__(self, candidates: List[VideoCandidate], k1: float = 1.2, b: float = 0.75):
+        self.candidates = list(candidates)
+        self.meta_scores = [c.meta_score for c in self.candidates]
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+        self._term_ids: Dict[str, int] = {}
+        self._weights: np.ndarray = None # terms x candidates, built on first score_matrix call
+
+        # Weighted term frequencies per document
+        doc_tfs: List[Dict[str, float]] = []
+        doc_lens: List[float] = []
+        for cand in self.candidates:
+            tf: Dict[str, float] = {}
+            for term in tokenize(cand.title):
+                tf[term] = tf.get(term, 0.0) + self.TITLE_WEIGHT
+            for term in tokenize(cand.description):
+                tf[term] = tf.get(term, 0.0) + self.DESCRIPTION_WEIGHT
+            doc_tfs.append(tf)
+            doc_lens.append(sum(tf.values()))
+
+        n_docs = len(self.candidates)
+        avg_len = (sum(doc_lens) / n_docs) if n_docs else 0.0
+
+        doc_freq: Dict[str, int] = {}
+        for tf in doc_tfs:
+            for term in tf:
+                doc_freq[term] = doc_freq.get(term, 0) + 1
+
+        # Precompute the full BM25 weight of every (term, doc) pair
+        for doc_idx, tf in enumerate(doc_tfs):
+            norm = k1 * (1 - b + b * (doc_lens[doc_idx] / avg_len)) if avg_len else k1
+            for term, freq in tf.items():
+                idf = math.log(1 + (n_docs - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+                weight = idf * (freq * (k1 + 1)) / (freq + norm)
+                self.postings.setdefault(term, []).append((doc_idx, weight))
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def scores(self, query: str) -> List[float]:
+        """BM25 relevance of every candidate to `query`, plus the meta_score tie-breaker."""
+        scores = [m * self.META_WEIGHT for m in self.meta_scores]
+        for term in set(tokenize(query)):
+            for doc_idx, weight in self.postings.get(term, ()):
+                scores[doc_idx] += weight
+        return scores
+
+    def score_matrix(self, queries: List[str]) -> np.ndarray:
+        """
+        Relevance of every candidate to every query as one (queries x candidates) matrix:
+        binary query-term matrix times the precomputed terms x candidates BM25 weights.
+        """
+        if self._weights is None:
+            self._term_ids = {term: i for i, term in enumerate(self.postings)}
+            weights = np.zeros((len(self._term_ids), len(self.candidates)), dtype=np.float64)
+            for term, posting in self.postings.items():
+                row = self._term_ids[term]
+                for doc_idx, weight in posting:
+                    weights[row, doc_idx] = weight
+            self._weights = weights
+
+        query_terms = np.zeros((len(queries), len(self._term_ids)), dtype=np.float64)
+        for q_idx, query in enumerate(queries):
+            for term in set(tokenize(query)):
+                term_id = self._term_ids.get(term)
+                if term_id is not None:
+                    query_terms[q_idx, term_id] = 1.0
+
+        meta = np.asarray(self.meta_scores, dtype=np.float64) * self.META_WEIGHT
+        return query_terms @ self._weights + meta
+
+    def rank(self, query: str) -> List[VideoCandidate]:
+        """All candidates, most relevant to `query` first (stable on ties)."""
+        scores = self.scores(query)
+        order = sorted(range(len(self.candidates)), key=lambda i: scores[i], reverse=True)
+        return [self.candidates[i] for i in order]
@@ -1,43 +1,72 @@
 from typing import List, Dict, Any, Optional
 from .base import VideoCandidate, LessonPlan
 from .embedding_service import embedding_service
+from .pool_index import keywords
 from app.ai.llm_client import llm_client
+from app.utils.transcript_index import transcript_index
 from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Label and filler words of the spec template ("Teach: X, Y; Level: beginner; Example: show
+# code snippet for Z", see prompts.LESSON_SPEC_PROMPT); they'd match nearly every coding video
+SPEC_TEMPLATE_WORDS = frozenset("""
+teach level beginner intermediate advanced example examples show code snippet snippets
+""".split())
+
+def spec_keywords(spec: str) -> List[str]:
+    """The spec's own content words, without the template's labels."""
+    return [term for term in keywords(spec) if term not in SPEC_TEMPLATE_WORDS]
+
 class ScoringService:
     def score_candidates_for_lesson(self, lesson: LessonPlan, candidates: List[VideoCandidate]) -> List[dict]:
         """
         Returns list of scored candidates (video_id, score, best_chunk).
         candidates argument is passed mainly to look up meta_scores if needed.
         """
-        # 1. Generate Spec
-        spec = llm_client.generate_lesson_spec(lesson.lesson_title, lesson.description)
-        logger.info(f"Generated spec for '{lesson.lesson_title}': {spec}")
-        
-        # 2. Vector Search (Simulating "Search whole corpus")
-        # In reality, we only want to search chunks belonging to our filtered start_candidates.
-        # But Chroma search is global. We can filter by `video_id` using `where` clause if we want to restrict search 
-        # to ONLY the candidates we found for this topic.
-        # For simplicity, we search globally (assuming index only has relevant content for this course run or doesn't matter).
-        # Better: we pass `candidate_ids` to filter.
+        return self.score_candidates_for_course([lesson], candidates)[0]
+
+    def score_candidates_for_course(self, lessons: List[LessonPlan], candidates: List[VideoCandidate]) -> List[List[dict]]:
+        """
+        Course-level scoring: one scored candidate list per lesson (same order as `lessons`).
+        All lesson specs go to Chroma in a single multi-query call, restricted to the chunks
+        of this course's shortlisted candidates, so retrieval cost doesn't grow with the
+        global corpus or with one round trip per lesson.
+        """
+        if not lessons:
+            return []
         
         candidate_ids = [c.video_id for c in candidates if c.is_shortlisted]
         if not candidate_ids:
-            return []
-
-        # Chroma `where` clause: field matches one of list. 
-        # Chroma `where` supports `$in`.
-        where_filter = {"video_id": {"$in": candidate_ids}} if len(candidate_ids) < 50 else None 
-        # If too many candidates, we might skip filter or batch. For MVP limit is 30.
+            return [[] for _ in lessons]
+        
+        # 1. Generate Specs (one batched LLM request for the whole course)
+        specs = llm_client.generate_lesson_specs([(l.lesson_title, l.description) for l in lessons])
+        for lesson, spec in zip(lessons, specs):
+            logger.info(f"Generated spec for '{lesson.lesson_title}': {spec}")
+        
+        # 2. Keyword prefilter: drop candidates whose (indexed) transcript shares no term
+        #    with any lesson spec; local FTS lookup, only narrows the vector search below
+        if settings.KEYWORD_PREFILTER:
+            # Stop and template words would match every transcript, so only the specs' content
+            # terms count; left unstemmed, the index applies its own (porter) stemming
+            spec_terms = " ".join(term for spec in specs for term in spec_keywords(spec))
+            keyword_ids = transcript_index.filter_videos(spec_terms, candidate_ids)
+            if keyword_ids:
+                if len(keyword_ids) < len(candidate_ids):
+                    logger.info(f"Keyword prefilter kept {len(keyword_ids)}/{len(candidate_ids)} candidates")
+                candidate_ids = keyword_ids
         
-        # We want top chunks.
-        results = embedding_service.query_similar_chunks(spec, n_results=10) # Get top 10 chunks globally (or filtered)
-        # Note: embedding_service need update to support `where`. 
-        # For now let's assume global search matches relevance anyway.
+        # 3. Vector Search, only over chunks belonging to our candidates (Chroma `where` supports `$in`)
+        where_filter = {"video_id": {"$in": candidate_ids}}
+        results_per_lesson = embedding_service.query_similar_chunks_batch(specs, n_results=10, where=where_filter)
         
+        candidate_map = {c.video_id: c for c in candidates}
+        return [self._combine_scores(results, candidate_map) for results in results_per_lesson]
+
+    def _combine_scores(self, results: List[dict], candidate_map: Dict[str, VideoCandidate]) -> List[dict]:
+        """Best chunk similarity per video, blended with the video's meta score, best first."""
         scores = {} # video_id -> {max_sim, best_chunk}
         
         for res in results:
@@ -57,9 +86,8 @@ class ScoringService:
                     'video_id': vid_id
                 }
         
-        # 3. Combine with Meta Score
+        # 4. Combine with Meta Score
         final_results = []
-        candidate_map = {c.video_id: c for c in candidates}
         
         for vid_id, data in scores.items():
             cand = candidate_map.get(vid_id)
@@ -1,10 +1,15 @@
-from typing import List
-import math
+from typing import Iterator, List, Optional
 import re
+import time
 from datetime import datetime
 from app.utils.yt_api import youtube_client
+from app.utils.disk_cache import normalize_query
+from app.utils.single_flight import SingleFlight
 from app.core.config import settings
 from .base import VideoCandidate
+from .pool_index import PoolIndex
+from .candidate_batch import CandidateBatch, meta_scores
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,49 +29,30 @@ def parse_duration(duration_iso: str) -> int:
     return hours * 3600 + minutes * 60 + seconds
 
 class VideoShortlistService:
+    # Hard filters applied as results stream in
+    MIN_DURATION_SECONDS = 300 # 5 mins
+    MIN_VIEWS = 1000
+
+    def __init__(self):
+        self._flight = SingleFlight()
+
     def search_candidates(self, topic: str, max_results: int = 30) -> List[VideoCandidate]:
         """
         Uses scraper (yt-dlp) to find videos.
+        Stops reading search results as soon as `max_results` hits pass the flat-result filters.
+        Concurrent assemblies searching the same pool share one search.
         """
-        query = topic 
-        logger.info(f"Searching YouTube (yt-dlp) for: {query}")
+        key = f"{max_results}:{normalize_query(topic)}"
+        candidates = self._flight.do(key, self._search_candidates_uncached, topic, max_results)
+        # Shared between coalesced callers - hand each its own objects
+        return [c.model_copy() for c in candidates]
+
+    def _search_candidates_uncached(self, topic: str, max_results: int) -> List[VideoCandidate]:
+        logger.info(f"Searching YouTube (yt-dlp) for: {topic}")
         
         try:
-            items = youtube_client.search_videos(query, max_results=max_results)
-            if not items:
-                return []
-            
-            candidates = []
+            candidates = list(self.stream_candidates(topic, enough=max_results))
             
-            # Map scraper items to candidate objects
-            for item in items:
-                # yt-dlp gives "duration_sec" directly (int)
-                duration_sec = item.get('duration_sec', 0)
-                
-                # Check strict filter early
-                if duration_sec < 300: # 5 mins
-                    continue
-                    
-                view_count = item.get('view_count', 0)
-                if view_count < 1000:
-                    continue
-                    
-                candidate = VideoCandidate(
-                    video_id=item['id'],
-                    title=item['title'],
-                    channel_title=item['channel'],
-                    channel_id=item['channel_id'],
-                    published_at=item['published_at'],
-                    duration_seconds=duration_sec,
-                    view_count=view_count,
-                    like_count=0,
-                    has_captions=True # Assumed
-                )
-                
-                # Compute Meta Score
-                candidate.meta_score = self._compute_meta_score(candidate)
-                candidates.append(candidate)
-                
             # Sort by meta score descending
             candidates.sort(key=lambda x: x.meta_score, reverse=True)
             
@@ -77,59 +63,140 @@ class VideoShortlistService:
             logger.error(f"Error in search_candidates: {e}")
             return []
 
-    def _compute_meta_score(self, cand: VideoCandidate) -> float:
-        # 1. View Score (Log scale)
-        # Max reasonable views ~1M for ed content?
-        # log10(1) = 0, log10(1M) = 6. 
-        view_score = min(math.log10(cand.view_count + 1) / 6.0, 1.0)
+    def stream_candidates(self, topic: str, enough: int, max_scan: Optional[int] = None, timeout: Optional[float] = None) -> Iterator[VideoCandidate]:
+        """
+        Yields qualifying candidates for `topic`, searching up to `max_scan` results (default `enough`).
+        Details are filled in after the search, under VIDEO_DETAILS_TIMEOUT_SECONDS.
+        """
+        max_scan = max_scan or enough
+        stream = youtube_client.iter_search_videos(topic, max_results=max_scan, timeout=timeout)
+        hits = []
+        try:
+            for item in stream:
+                # Don't spend detail fetches on hits the flat result already rules out
+                if not self._fails_known_filters(item):
+                    hits.append(item)
+                    if len(hits) >= enough:
+                        break
+        finally:
+            # Stops the search early; what was read is cached as the search's prefix
+            stream.close()
+
+        found = 0
+        deadline = time.monotonic() + settings.VIDEO_DETAILS_TIMEOUT_SECONDS
+        for i in range(0, len(hits), settings.VIDEO_DETAILS_BATCH_SIZE):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning(f"Details budget spent after {i}/{len(hits)} hits: {topic}")
+                return
+            batch = hits[i:i + settings.VIDEO_DETAILS_BATCH_SIZE]
+            self._fill_missing_details(batch, timeout=remaining)
+
+            candidates = [c for c in (self._to_candidate(item) for item in batch) if c is not None]
+            # Meta scores for the whole batch in one vectorized pass
+            CandidateBatch(candidates).compute_meta_scores()
+
+            for candidate in candidates:
+                yield candidate
+                found += 1
+                if found >= enough:
+                    return
+
+    def _fails_known_filters(self, item: dict) -> bool:
+        """True if fields the search already reported (0 = unknown) rule the hit out."""
+        duration_sec = item.get('duration_sec') or 0
+        view_count = item.get('view_count') or 0
+        return (0 < duration_sec < self.MIN_DURATION_SECONDS) or (0 < view_count < self.MIN_VIEWS)
+
+    def _fill_missing_details(self, items: List[dict], timeout: Optional[float] = None):
+        """Fills likes/views/duration/description in place from the (cached) details fetcher."""
+        incomplete = [
+            item for item in items
+            if item.get('like_count') is None or not item.get('view_count') or not item.get('duration_sec')
+        ]
+        if not incomplete:
+            return
         
-        # 2. Like Ratio
-        # Ideal 0.05 (5%)? 
-        ratio = cand.like_count / (cand.view_count + 1)
-        like_score = min(ratio * 20, 1.0) # if ratio > 5%, score is 1
+        try:
+            details = youtube_client.get_video_details([item['id'] for item in incomplete], timeout=timeout)
+        except Exception as e:
+            logger.warning(f"Video details enrichment failed: {e}")
+            return
         
-        # 3. Duration Score
-        # Prefer 5-20 mins (300 - 1200s)
-        dur = cand.duration_seconds
-        if 300 <= dur <= 1200:
-            dur_score = 1.0
-        elif 120 <= dur < 300:
-            dur_score = 0.7
-        elif 1200 < dur <= 3600: # up to 1h
-            dur_score = 0.6
-        else:
-            dur_score = 0.3
-            
-        # 4. Recency (Optional, maybe less important for core concepts)
-        recency_score = 0.5 
+        by_id = {d['id']: d for d in details}
+        for item in incomplete:
+            d = by_id.get(item['id'])
+            if not d:
+                continue
+            for field in ('view_count', 'like_count', 'duration_sec', 'description', 'channel_id'):
+                if not item.get(field) and d.get(field):
+                    item[field] = d[field]
+            if d.get('has_captions') is False:
+                item['has_captions'] = False
+
+    def _to_candidate(self, item: dict) -> Optional[VideoCandidate]:
+        """Maps a search item to a candidate (meta_score not set yet), or None if it fails the hard filters."""
+        # yt-dlp gives "duration_sec" directly (int)
+        duration_sec = item.get('duration_sec', 0)
         
-        # Weights
-        final = (view_score * 0.4) + (like_score * 0.3) + (dur_score * 0.3)
-        return final
+        # Check strict filter early
+        if duration_sec < self.MIN_DURATION_SECONDS:
+            return None
+            
+        view_count = item.get('view_count', 0)
+        if view_count < self.MIN_VIEWS:
+            return None
+            
+        candidate = VideoCandidate(
+            video_id=item['id'],
+            title=item['title'],
+            channel_title=item['channel'],
+            channel_id=item['channel_id'],
+            published_at=item['published_at'],
+            duration_seconds=duration_sec,
+            view_count=view_count,
+            like_count=item.get('like_count') or 0,
+            description=item.get('description') or "",
+            has_captions=item.get('has_captions', True) # Assumed unless details said otherwise
+        )
+        return candidate
+
+    def _compute_meta_score(self, cand: VideoCandidate) -> float:
+        """Meta score for a single candidate; see candidate_batch.meta_scores for the formula."""
+        return float(meta_scores(
+            np.array([cand.view_count], dtype=np.float64),
+            np.array([cand.like_count], dtype=np.float64),
+            np.array([cand.duration_seconds], dtype=np.float64)
+        )[0])
+
+    def build_pool_index(self, pool: List[VideoCandidate]) -> PoolIndex:
+        """Tokenizes and weights the pool once so each lesson is just an index lookup."""
+        return PoolIndex(pool)
 
-    def select_best_from_pool(self, pool: List[VideoCandidate], lesson_title: str) -> List[VideoCandidate]:
+    def score_matrix(self, index: PoolIndex, lesson_titles: List[str]) -> np.ndarray:
         """
-        Re-ranks the global video pool for a specific lesson title.
-        Uses simple keyword overlap or string probability.
+        Lessons x candidates relevance for a whole course in one pass.
+        Candidates without captions are masked to -inf so they never win.
+        """
+        scores = index.score_matrix(lesson_titles)
+        has_captions = CandidateBatch(index.candidates).has_captions
+        scores[:, ~has_captions] = -np.inf
+        return scores
+
+    def select_best_from_pool(self, pool: List[VideoCandidate], lesson_title: str, index: Optional[PoolIndex] = None) -> List[VideoCandidate]:
+        """
+        Re-ranks the global video pool for a specific lesson title (BM25 + meta score).
+        Pass the job's prebuilt `index` to avoid re-indexing the pool for every lesson.
         """
         if not pool:
             return []
-            
-        def score_relevance(cand, query):
-            # Simple keyword matching
-            q_words = set(query.lower().split())
-            title_words = set(cand.title.lower().split())
-            desc_words = set((cand.description or "").lower().split())
-            
-            overlap = len(q_words.intersection(title_words))
-            desc_overlap = len(q_words.intersection(desc_words))
-            
-            # Weighted score: Title overlap * 2 + Meta Score
-            return (overlap * 2.0) + (desc_overlap * 0.5) + (cand.meta_score * 0.5)
+        
+        if index is None:
+            index = self.build_pool_index(pool)
             
         # Sort pool by relevance to THIS lesson
         # We process ALL of them, but return sorted list
-        ranked = sorted(pool, key=lambda c: score_relevance(c, lesson_title), reverse=True)
+        ranked = index.rank(lesson_title)
         
         # Return top 3 for transcript processing
         MAX_TRANSCRIPT_CANDIDATES = 3
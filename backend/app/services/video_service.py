@@ -1,65 +1,40 @@
-import subprocess
-import json
-from youtube_transcript_api import YouTubeTranscriptApi
 from typing import Optional
+from app.utils.yt_api import youtube_client
+from app.utils.transcript_store import transcript_store
 
 class VideoService:
     @staticmethod
-    def search_video(query: str, limit: int = 1):
-        """Search for videos using yt-dlp"""
+    def search_video(query: str, limit: int = 1, timeout: float = 10):
+        """
+        Search for videos through the shared search layer (cached + coalesced, see YouTubeAPI)
+        and map them to the lesson video shape the roadmap uses.
+        """
         try:
-            # Use yt-dlp to search YouTube
-            cmd = [
-                'yt-dlp',
-                f'ytsearch{limit}:{query}',
-                '--dump-json',
-                '--no-warnings',
-                '--skip-download'
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            
-            if result.returncode != 0:
-                print(f"yt-dlp search failed: {result.stderr}")
-                return None
-            
-            videos = []
-            # yt-dlp outputs one JSON object per line for multiple results
-            for line in result.stdout.strip().split('\n'):
-                if not line:
-                    continue
-                try:
-                    video_data = json.loads(line)
-                    videos.append({
-                        "video_id": video_data.get('id'),
-                        "title": video_data.get('title'),
-                        "link": f"https://www.youtube.com/watch?v={video_data.get('id')}",
-                        "thumbnail": video_data.get('thumbnail'),
-                        "channel": video_data.get('uploader') or video_data.get('channel'),
-                        "duration": str(video_data.get('duration', 0)) + 's' if video_data.get('duration') else 'Unknown'
-                    })
-                except json.JSONDecodeError as e:
-                    print(f"Failed to parse yt-dlp JSON: {e}")
-                    continue
-            
-            return videos if videos else None
-            
-        except subprocess.TimeoutExpired:
-            print(f"Video search timed out for query: {query}")
-            return None
+            items = youtube_client.search_videos(query, max_results=limit, timeout=timeout)
         except Exception as e:
             print(f"Error in video search: {e}")
             return None
+        
+        videos = [
+            {
+                "video_id": item["id"],
+                "title": item["title"],
+                "link": item["link"],
+                "thumbnail": item["thumbnail"],
+                "channel": item["channel"],
+                "duration": f"{item['duration_sec']}s" if item.get("duration_sec") else 'Unknown'
+            }
+            for item in items
+        ]
+        return videos if videos else None
 
     @staticmethod
     def get_transcript(video_id: str):
-        try:
-            transcript = YouTubeTranscriptApi.get_transcript(video_id)
-            # Combine for full text
-            full_text = " ".join([entry['text'] for entry in transcript])
-            return {"transcript": transcript, "full_text": full_text}
-        except Exception as e:
-            print(f"Error fetching transcript for {video_id}: {e}")
+        # Served from the local transcript store; fetched from YouTube only on a miss
+        transcript = transcript_store.get(video_id)
+        if transcript is None:
             return None
+        # The text buffer already is the full text
+        return {"transcript": transcript, "full_text": transcript.full_text}
 
 video_service = VideoService()
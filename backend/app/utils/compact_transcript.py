@@ -0,0 +1,195 @@
+from array import array
+from bisect import bisect_left, bisect_right
+import hashlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+import struct
+
+# Separator between segment texts in the shared buffer, so the buffer doubles as full_text
+_SEP = " "
+_HEADER = struct.Struct("<4sI")
+_MAGIC = b"CTR1"
+
+class CompactTranscript:
+    """
+    Columnar transcript: start/duration as float arrays and all segment texts in one
+    string buffer with per-segment offsets. About 20 bytes per segment plus the text,
+    versus several hundred for a list of {text, start, duration} dicts.
+
+    Segments are kept in start order, so time lookups are a bisect and time windows
+    are array slices. Iterating yields the old dicts for code that still expects them.
+    """
+    __slots__ = ("starts", "durations", "offsets", "buffer", "_digest", "_max_ends")
+
+    def __init__(self, starts: array, durations: array, offsets: array, buffer: str):
+        self.starts = starts       # array('d'), seconds, ascending
+        self.durations = durations # array('d'), seconds
+        self.offsets = offsets     # array('I'), len(starts) + 1 entries into buffer
+        self.buffer = buffer
+        self._digest = None
+        self._max_ends = None
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Any]) -> "CompactTranscript":
+        """
+        Builds from youtube_transcript_api output: dicts with text/start/duration, or
+        snippet objects with the same attributes. Out-of-order input is sorted by start.
+        """
+        rows = []
+        for seg in segments or ():
+            if isinstance(seg, dict):
+                rows.append((float(seg["start"]), float(seg.get("duration") or 0.0), seg.get("text") or ""))
+            else:
+                rows.append((float(seg.start), float(seg.duration or 0.0), seg.text or ""))
+        if any(rows[i][0] > rows[i + 1][0] for i in range(len(rows) - 1)):
+            rows.sort(key=lambda r: r[0])
+
+        starts = array("d", (r[0] for r in rows))
+        durations = array("d", (r[1] for r in rows))
+        offsets = array("I", [0])
+        parts: List[str] = []
+        pos = 0
+        for _, _, text in rows:
+            text = text.replace("\n", " ")
+            parts.append(text)
+            pos += len(text) + len(_SEP)
+            offsets.append(pos)
+        return cls(starts, durations, offsets, _SEP.join(parts))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __bool__(self) -> bool:
+        return len(self.starts) > 0
+
+    def text_at(self, i: int) -> str:
+        return self.buffer[self.offsets[i]:self.offsets[i + 1] - len(_SEP)]
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("transcript segment index out of range")
+        return {"text": self.text_at(i), "start": self.starts[i], "duration": self.durations[i]}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield {"text": self.text_at(i), "start": self.starts[i], "duration": self.durations[i]}
+
+    @property
+    def full_text(self) -> str:
+        return self.buffer
+
+    @property
+    def duration(self) -> float:
+        """End time of the last segment (0 for an empty transcript)."""
+        if not self:
+            return 0.0
+        return self.starts[-1] + self.durations[-1]
+
+    def segment_at(self, t: float) -> Optional[int]:
+        """Index of the segment being spoken at time `t` (the last one starting at or before it)."""
+        i = bisect_right(self.starts, t) - 1
+        return i if i >= 0 else None
+
+    def _running_max_ends(self) -> array:
+        """Prefix max of segment end times (built once); ascending, so it can be bisected."""
+        if self._max_ends is None:
+            max_ends = array("d")
+            latest = float("-inf")
+            for s, d in zip(self.starts, self.durations):
+                latest = max(latest, s + d)
+                max_ends.append(latest)
+            self._max_ends = max_ends
+        return self._max_ends
+
+    def index_range(self, start: Optional[float] = None, end: Optional[float] = None):
+        """
+        Half-open index range [lo, hi) covering every segment overlapping the window
+        [start, end). Segments that began before `start` but are still running are
+        included, even behind later ones (auto-captions overlap their successors).
+        """
+        lo = 0
+        if start is not None:
+            # First segment ending after `start`; earlier ones have all finished
+            lo = bisect_right(self._running_max_ends(), start)
+        hi = len(self) if end is None else bisect_left(self.starts, end)
+        return lo, max(lo, hi)
+
+    def slice(self, start: Optional[float] = None, end: Optional[float] = None) -> "CompactTranscript":
+        """Segments overlapping [start, end) as a new transcript; copies only that window."""
+        lo, hi = self.index_range(start, end)
+        return self.slice_indices(lo, hi)
+
+    def slice_indices(self, lo: int, hi: int) -> "CompactTranscript":
+        if lo >= hi:
+            return CompactTranscript(array("d"), array("d"), array("I", [0]), "")
+        base = self.offsets[lo]
+        offsets = array("I", (o - base for o in self.offsets[lo:hi + 1]))
+        return CompactTranscript(self.starts[lo:hi], self.durations[lo:hi], offsets, self.text_range(lo, hi))
+
+    def text_range(self, lo: int, hi: int) -> str:
+        """Texts of segments [lo, hi) joined by spaces, as one slice of the buffer."""
+        if lo >= hi:
+            return ""
+        return self.buffer[self.offsets[lo]:self.offsets[hi] - len(_SEP)]
+
+    def texts(self) -> List[str]:
+        return [self.text_at(i) for i in range(len(self))]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Parallel arrays (start, duration, text); the JSON-friendly form."""
+        return {"start": self.starts.tolist(), "duration": self.durations.tolist(), "text": self.texts()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CompactTranscript":
+        return cls.from_segments(
+            {"start": s, "duration": d, "text": t}
+            for s, d, t in zip(data.get("start", ()), data.get("duration", ()), data.get("text", ()))
+        )
+
+    def to_bytes(self) -> bytes:
+        """Binary form for storage: header, raw arrays, utf-8 buffer."""
+        return b"".join((
+            _HEADER.pack(_MAGIC, len(self)),
+            self.starts.tobytes(),
+            self.durations.tobytes(),
+            self.offsets.tobytes(),
+            self.buffer.encode("utf-8"),
+        ))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CompactTranscript":
+        magic, n = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Not a compact transcript")
+        pos = _HEADER.size
+        starts, durations, offsets = array("d"), array("d"), array("I")
+        for arr, count in ((starts, n), (durations, n), (offsets, n + 1)):
+            size = arr.itemsize * count
+            arr.frombytes(data[pos:pos + size])
+            pos += size
+        return cls(starts, durations, offsets, data[pos:].decode("utf-8"))
+
+    def digest(self) -> str:
+        """Content hash (computed once per instance); treat the transcript as immutable."""
+        if self._digest is None:
+            self._digest = hashlib.sha1(self.to_bytes()).hexdigest()
+        return self._digest
+
+    def nbytes(self) -> int:
+        """Approximate payload size in memory (arrays + text)."""
+        return (
+            self.starts.itemsize * len(self.starts)
+            + self.durations.itemsize * len(self.durations)
+            + self.offsets.itemsize * len(self.offsets)
+            + len(self.buffer)
+        )
+
+
+# Anything the pipeline accepts as a transcript: compact, or the raw list of segments
+TranscriptLike = Union[CompactTranscript, Iterable[Any]]
+
+def as_compact(transcript: TranscriptLike) -> CompactTranscript:
+    if isinstance(transcript, CompactTranscript):
+        return transcript
+    return CompactTranscript.from_segments(transcript)
@@ -0,0 +1,192 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class DiskCache:
+    """
+    Small SQLite-backed key/value cache with TTL expiry and size-bounded LRU eviction.
+    Values are stored as JSON by default, so anything json.dumps accepts can be cached;
+    pass `dumps`/`loads` to store another encoding (e.g. raw float32 bytes).
+    Survives restarts, which keeps expensive lookups (yt-dlp searches etc.) warm after a deploy.
+    """
+    def __init__(
+        self, path: str, table: str, ttl_seconds: int, max_entries: int,
+        dumps: Callable[[Any], Any] = json.dumps, loads: Callable[[Any], Any] = json.loads
+    ):
+        self.path = path
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.dumps = dumps
+        self.loads = loads
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # Process-local lookup counters (see stats())
+        self.hits = 0
+        self.misses = 0
+
+    def _get_conn(self) -> sqlite3.Connection:
+        # Lazy connect so importing a module with a cache never touches the disk
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_accessed_idx ON {self.table} (accessed_at)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_expires_idx ON {self.table} (expires_at)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                row = conn.execute(
+                    f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return default
+                if row[1] <= now:
+                    conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    conn.commit()
+                    self.misses += 1
+                    return default
+                # Touch for LRU ordering
+                conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+                conn.commit()
+                self.hits += 1
+            return self.loads(row[0])
+        except Exception as e:
+            # A broken cache must never break the request path
+            logger.warning(f"DiskCache get failed ({self.table}): {e}")
+            return default
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None):
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        try:
+            payload = self.dumps(value)
+            with self._lock:
+                conn = self._get_conn()
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, payload, now + ttl, now)
+                )
+                self._evict(conn, now)
+                conn.commit()
+        except Exception as e:
+            logger.warning(f"DiskCache set failed ({self.table}): {e}")
+
+    def get_many(self, keys: List[str], record_stats: bool = True) -> Dict[str, Any]:
+        """
+        Returns {key: value} for the keys that are present and fresh.
+        `record_stats=False` keeps secondary lookups out of the hit/miss counters.
+        """
+        found: Dict[str, Any] = {}
+        if not keys:
+            return found
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                # Stay well under SQLite's bound-parameter limit
+                for i in range(0, len(keys), 500):
+                    batch = keys[i:i + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = conn.execute(
+                        f"SELECT key, value FROM {self.table} WHERE key IN ({placeholders}) AND expires_at > ?",
+                        (*batch, now)
+                    ).fetchall()
+                    for key, value in rows:
+                        found[key] = self.loads(value)
+                    if rows:
+                        conn.executemany(
+                            f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?",
+                            [(now, key) for key, _ in rows]
+                        )
+                conn.commit()
+                if record_stats:
+                    self.hits += len(found)
+                    self.misses += len(keys) - len(found)
+        except Exception as e:
+            logger.warning(f"DiskCache get_many failed ({self.table}): {e}")
+        return found
+
+    def set_many(self, items: Dict[str, Any], ttl_seconds: Optional[int] = None):
+        if not items:
+            return
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        try:
+            rows = [(key, self.dumps(value), now + ttl, now) for key, value in items.items()]
+            with self._lock:
+                conn = self._get_conn()
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+                self._evict(conn, now)
+                conn.commit()
+        except Exception as e:
+            logger.warning(f"DiskCache set_many failed ({self.table}): {e}")
+
+    def delete(self, key: str):
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                conn.commit()
+        except Exception as e:
+            logger.warning(f"DiskCache delete failed ({self.table}): {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters since process start, plus the current number of stored entries."""
+        entries = None
+        try:
+            with self._lock:
+                entries = self._get_conn().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        except Exception as e:
+            logger.warning(f"DiskCache stats failed ({self.table}): {e}")
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """Drops expired rows, then least recently used rows beyond max_entries. Caller holds the lock."""
+        conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,))
+        count = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,)
+            )
+
+def normalize_query(query: str) -> str:
+    """Case/whitespace-insensitive form of a search query, used as a cache key."""
+    return " ".join((query or "").lower().split())
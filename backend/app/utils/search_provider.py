@@ -0,0 +1,221 @@
+import hashlib
+import json
+import os
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.utils.disk_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+class SearchProvider(ABC):
+    """
+    Where video search results come from.
+    Every provider returns the same normalized video dicts:
+        id, title, channel, channel_id, duration_sec, view_count, like_count (None if unknown),
+        link, published_at, thumbnail
+    and get_details adds description and has_captions.
+    Caching and request coalescing live above this, in YouTubeAPI.
+    """
+    name: str = "base"
+
+    @abstractmethod
+    def iter_search(self, query: str, max_results: int, timeout: Optional[float] = None) -> Iterator[Dict]:
+        """Yields videos as they become available. Raises concurrent.futures.TimeoutError on timeout."""
+
+    def search(self, query: str, max_results: int, timeout: Optional[float] = None) -> List[Dict]:
+        return list(self.iter_search(query, max_results, timeout=timeout))
+
+    def get_details(self, video_ids: List[str], timeout: Optional[float] = None) -> List[Dict]:
+        """Full metadata for the given videos; unknown videos are left out."""
+        return []
+
+def video_from_entry(data: dict) -> Optional[dict]:
+    """Maps one yt-dlp (flat) entry to the normalized video dict. Returns None for unusable entries."""
+    try:
+        # yt-dlp flat-playlist often gives: id, title, uploader, duration, view_count (sometimes)
+        vid_id = data.get('id')
+        title = data.get('title')
+
+        # Basic filters
+        if not vid_id or not title: return None
+
+        # Duration is usually float seconds
+        duration = data.get('duration', 0)
+        if isinstance(duration, (int, float)):
+            duration_sec = int(duration)
+        else:
+            duration_sec = 0
+
+        # View count might be missing in flat-playlist mode for some searches,
+        # but we'll take what we get.
+        view_count = data.get('view_count', 0)
+        if view_count is None: view_count = 0
+
+        return {
+            "id": vid_id,
+            "title": title,
+            "channel": data.get('uploader', 'Unknown'),
+            "channel_id": data.get('uploader_id', ''),
+            "duration_sec": duration_sec, # Use distinct key for clarity
+            "view_count": int(view_count),
+            "like_count": data.get('like_count'), # Never present in flat results; see get_details
+            "link": f"https://www.youtube.com/watch?v={vid_id}",
+            "published_at": data.get('upload_date', ''), # YYYYMMDD
+            "thumbnail": f"https://i.ytimg.com/vi/{vid_id}/hqdefault.jpg" # Construct standard thumb
+        }
+
+    except Exception as e:
+        logger.warning(f"Failed to parse yt-dlp entry: {e}")
+        return None
+
+def details_from_info(vid_id: str, info: dict) -> dict:
+    """Maps a full yt-dlp info dict to the normalized details dict."""
+    return {
+        "id": vid_id,
+        "title": info.get('title') or '',
+        "channel": info.get('uploader') or info.get('channel') or 'Unknown',
+        "channel_id": info.get('channel_id') or info.get('uploader_id') or '',
+        "duration_sec": int(info.get('duration') or 0),
+        "view_count": int(info.get('view_count') or 0),
+        "like_count": int(info.get('like_count') or 0),
+        "description": info.get('description') or '',
+        "published_at": info.get('upload_date') or '',
+        "has_captions": bool(info.get('subtitles') or info.get('automatic_captions')),
+    }
+
+class YtDlpSearchProvider(SearchProvider):
+    """Live YouTube search through the in-process yt-dlp engine."""
+    name = "ytdlp"
+
+    def __init__(self):
+        # Imported here so offline providers never load yt-dlp
+        from app.utils.ytdlp_engine import ytdlp_engine
+        self.engine = ytdlp_engine
+
+    def iter_search(self, query: str, max_results: int, timeout: Optional[float] = None) -> Iterator[Dict]:
+        for data in self.engine.iter_search(query, max_results, timeout=timeout):
+            video = video_from_entry(data)
+            if video:
+                yield video
+
+    def search(self, query: str, max_results: int, timeout: Optional[float] = None) -> List[Dict]:
+        # Same as `yt-dlp --dump-json --flat-playlist ytsearchN:query`, minus the process spawn
+        entries = self.engine.search(query, max_results, flat=True, timeout=timeout)
+        return [v for v in (video_from_entry(data) for data in entries) if v]
+
+    def get_details(self, video_ids: List[str], timeout: Optional[float] = None) -> List[Dict]:
+        urls = [f"https://www.youtube.com/watch?v={vid}" for vid in video_ids]
+        infos = self.engine.extract_many(urls, flat=False, timeout=timeout)
+        return [details_from_info(vid, info) for vid, info in zip(video_ids, infos) if info]
+
+def fixture_filename(query: str) -> str:
+    return hashlib.sha1(normalize_query(query).encode("utf-8")).hexdigest()[:16] + ".json"
+
+class FixtureSearchProvider(SearchProvider):
+    """
+    Deterministic offline provider serving recorded result sets from disk, for benchmarks
+    and load tests. Each recording is `<sha1(normalized query)[:16]>.json` holding
+    {"query": ..., "results": [video dicts]}.
+    Queries without a recording get one of the recordings picked by query hash, so any
+    roadmap can be replayed at realistic scale; with strict=True they get no results.
+    """
+    name = "fixture"
+
+    def __init__(self, directory: str, strict: bool = False):
+        self.directory = directory
+        self.strict = strict
+        self._recordings: Optional[Dict[str, List[Dict]]] = None
+        self._videos: Dict[str, Dict] = {}
+
+    def _load(self) -> Dict[str, List[Dict]]:
+        if self._recordings is None:
+            recordings = {}
+            if os.path.isdir(self.directory):
+                for filename in sorted(os.listdir(self.directory)):
+                    if not filename.endswith(".json"):
+                        continue
+                    try:
+                        with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+                            recordings[filename] = json.load(f).get("results", [])
+                    except Exception as e:
+                        logger.warning(f"Skipping unreadable search fixture {filename}: {e}")
+            for results in recordings.values():
+                for video in results:
+                    self._videos.setdefault(video["id"], video)
+            logger.info(f"Loaded {len(recordings)} search fixtures from {self.directory}")
+            self._recordings = recordings
+        return self._recordings
+
+    def iter_search(self, query: str, max_results: int, timeout: Optional[float] = None) -> Iterator[Dict]:
+        recordings = self._load()
+        results = recordings.get(fixture_filename(query))
+        if results is None and recordings and not self.strict:
+            names = sorted(recordings)
+            digest = int(hashlib.sha1(normalize_query(query).encode("utf-8")).hexdigest(), 16)
+            results = recordings[names[digest % len(names)]]
+        for video in (results or [])[:max_results]:
+            yield dict(video)
+
+    def get_details(self, video_ids: List[str], timeout: Optional[float] = None) -> List[Dict]:
+        self._load()
+        details = []
+        for vid in video_ids:
+            video = self._videos.get(vid)
+            if video:
+                detail = {"description": "", "has_captions": True, **video}
+                detail["like_count"] = detail.get("like_count") or 0
+                details.append(detail)
+        return details
+
+class RecordingSearchProvider(SearchProvider):
+    """Wraps another provider and writes every completed search as a fixture, to build offline datasets."""
+    name = "record"
+
+    def __init__(self, inner: SearchProvider, directory: str):
+        self.inner = inner
+        self.directory = directory
+
+    def iter_search(self, query: str, max_results: int, timeout: Optional[float] = None) -> Iterator[Dict]:
+        results = []
+        for video in self.inner.iter_search(query, max_results, timeout=timeout):
+            results.append(video)
+            yield video
+        self._record(query, results)
+
+    def search(self, query: str, max_results: int, timeout: Optional[float] = None) -> List[Dict]:
+        results = self.inner.search(query, max_results, timeout=timeout)
+        self._record(query, results)
+        return results
+
+    def get_details(self, video_ids: List[str], timeout: Optional[float] = None) -> List[Dict]:
+        return self.inner.get_details(video_ids, timeout=timeout)
+
+    def _record(self, query: str, results: List[Dict]):
+        if not results:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, fixture_filename(query)), "w", encoding="utf-8") as f:
+                json.dump({"query": query, "results": results}, f, indent=1)
+        except Exception as e:
+            logger.warning(f"Failed to record search fixture for '{query}': {e}")
+
+_search_provider: Optional[SearchProvider] = None
+
+def get_search_provider() -> SearchProvider:
+    """Lazy initialization of the provider selected by SEARCH_PROVIDER (ytdlp | fixture | record)"""
+    global _search_provider
+    if _search_provider is None:
+        kind = settings.SEARCH_PROVIDER
+        if kind == "fixture":
+            _search_provider = FixtureSearchProvider(settings.SEARCH_FIXTURES_DIR)
+        elif kind == "record":
+            _search_provider = RecordingSearchProvider(YtDlpSearchProvider(), settings.SEARCH_FIXTURES_DIR)
+        elif kind == "ytdlp":
+            _search_provider = YtDlpSearchProvider()
+        else:
+            raise ValueError(f"Unknown SEARCH_PROVIDER: {kind}")
+    return _search_provider
@@ -0,0 +1,252 @@
+import heapq
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.core.config import settings
+from app.utils.compact_transcript import CompactTranscript
+
+logger = logging.getLogger(__name__)
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+def fts_query(text: str, match_all: bool = True) -> str:
+    """
+    Turns free text into a safe FTS5 expression: every word quoted (so user input can't
+    inject FTS syntax), joined by implicit AND, or by OR for long lesson specs.
+    """
+    terms = list(dict.fromkeys(t.lower() for t in _TERM_RE.findall(text or "")))
+    quoted = [f'"{t}"' for t in terms]
+    return (" " if match_all else " OR ").join(quoted)
+
+class TranscriptIndex:
+    """
+    Local full-text index over transcripts (SQLite FTS5, porter stemming). Each row is a
+    short window of consecutive caption segments (~WINDOW_SECONDS), so hits carry a
+    timestamp to jump to and phrases split across caption lines still match.
+
+    Every video owns a contiguous rowid block (its slot << SLOT_BITS), so scoping a query
+    to some videos and re-indexing one are rowid range lookups, independent of how many
+    other videos are indexed. Videos are linked to lessons/courses, so searches can be
+    scoped to either. Keyword lookups are local and take milliseconds.
+    """
+    WINDOW_SECONDS = 15.0
+    SLOT_BITS = 20 # windows per video: ~1M, i.e. months of captions
+    SCHEMA_VERSION = 2
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _get_conn(self) -> sqlite3.Connection:
+        # Lazy connect so importing this module never touches the disk
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] < self.SCHEMA_VERSION:
+                # Older layout without per-video rowid blocks; it's a cache, so rebuild it
+                # (transcripts are re-indexed as they are fetched or processed again)
+                conn.execute("DROP TABLE IF EXISTS segments")
+                conn.execute("DROP TABLE IF EXISTS videos")
+                conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS segments USING fts5("
+                "text, video_id UNINDEXED, start_time UNINDEXED, end_time UNINDEXED, "
+                "tokenize='porter unicode61')"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS videos ("
+                "slot INTEGER PRIMARY KEY, video_id TEXT UNIQUE NOT NULL, digest TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS lesson_videos ("
+                "lesson_id TEXT PRIMARY KEY, course_id TEXT, video_id TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS lesson_videos_course_idx ON lesson_videos (course_id)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _rowid_range(self, slot: int) -> Tuple[int, int]:
+        """Inclusive rowid bounds of a video's block."""
+        first = slot << self.SLOT_BITS
+        return first, first + (1 << self.SLOT_BITS) - 1
+
+    def _slots(self, conn, video_ids: List[str]) -> Dict[str, int]:
+        slots: Dict[str, int] = {}
+        for i in range(0, len(video_ids), 500):
+            batch = video_ids[i:i + 500]
+            slots.update(conn.execute(
+                f"SELECT video_id, slot FROM videos WHERE video_id IN ({','.join('?' * len(batch))})", batch
+            ).fetchall())
+        return slots
+
+    def _windows(self, transcript: CompactTranscript) -> Iterable[Tuple[str, float, float]]:
+        """(text, start, end) for consecutive runs of segments spanning ~WINDOW_SECONDS."""
+        first = 0
+        for i in range(1, len(transcript) + 1):
+            if i == len(transcript) or transcript.starts[i] - transcript.starts[first] >= self.WINDOW_SECONDS:
+                end = transcript.starts[i - 1] + transcript.durations[i - 1]
+                yield transcript.text_range(first, i), transcript.starts[first], end
+                first = i
+
+    def index_transcript(self, video_id: str, transcript: CompactTranscript):
+        """(Re)indexes a video; a no-op when the same content is already indexed."""
+        if not transcript:
+            return
+        digest = transcript.digest()
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                row = conn.execute("SELECT slot, digest FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+                if row and row[1] == digest:
+                    return
+                if row:
+                    slot = row[0]
+                    conn.execute("UPDATE videos SET digest = ? WHERE slot = ?", (digest, slot))
+                    conn.execute("DELETE FROM segments WHERE rowid BETWEEN ? AND ?", self._rowid_range(slot))
+                else:
+                    slot = conn.execute(
+                        "INSERT INTO videos (video_id, digest) VALUES (?, ?)", (video_id, digest)
+                    ).lastrowid
+                first, last = self._rowid_range(slot)
+                rows = []
+                for rowid, (text, start, end) in enumerate(self._windows(transcript), start=first):
+                    if rowid > last:
+                        break
+                    rows.append((rowid, text, video_id, start, end))
+                conn.executemany(
+                    "INSERT INTO segments (rowid, text, video_id, start_time, end_time) VALUES (?, ?, ?, ?, ?)", rows
+                )
+                conn.commit()
+        except Exception as e:
+            # Search is an extra; indexing problems must not break transcript fetching
+            logger.warning(f"Transcript indexing failed for {video_id}: {e}")
+
+    def link_lessons(self, course_id: str, lessons: Iterable[Tuple[str, str]]):
+        """Replaces the course's (lesson_id, video_id) links used for scoped searches."""
+        rows = [(str(lesson_id), str(course_id), video_id) for lesson_id, video_id in lessons if lesson_id and video_id]
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                conn.execute("DELETE FROM lesson_videos WHERE course_id = ?", (str(course_id),))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO lesson_videos (lesson_id, course_id, video_id) VALUES (?, ?, ?)", rows
+                )
+                conn.commit()
+        except Exception as e:
+            logger.warning(f"Linking lessons of course {course_id} failed: {e}")
+
+    def _scope_video_ids(self, conn, course_id: Optional[str], lesson_id: Optional[str]) -> Optional[List[str]]:
+        if lesson_id is not None:
+            rows = conn.execute("SELECT video_id FROM lesson_videos WHERE lesson_id = ?", (str(lesson_id),))
+        elif course_id is not None:
+            rows = conn.execute("SELECT DISTINCT video_id FROM lesson_videos WHERE course_id = ?", (str(course_id),))
+        else:
+            return None
+        return [r[0] for r in rows]
+
+    def search(
+        self,
+        query: str,
+        course_id: Optional[str] = None,
+        lesson_id: Optional[str] = None,
+        video_id: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[dict]:
+        """
+        Best-matching transcript windows, each with the video, its time span and a
+        highlighted snippet. Optionally scoped to a course, a lesson or a single video.
+        Unscoped searches rank with FTS5's BM25; scoped ones see _scoped_rows.
+        """
+        expression = fts_query(query)
+        if not expression:
+            return []
+        with self._lock:
+            conn = self._get_conn()
+            video_ids = self._scope_video_ids(conn, course_id, lesson_id)
+            if video_id is not None:
+                video_ids = [video_id] if video_ids is None else [v for v in video_ids if v == video_id]
+
+            if video_ids is None:
+                rows = conn.execute(
+                    "SELECT video_id, start_time, end_time, snippet(segments, 0, '[', ']', '…', 16), -bm25(segments) "
+                    "FROM segments WHERE segments MATCH ? ORDER BY bm25(segments) LIMIT ?",
+                    (expression, limit)
+                ).fetchall()
+            else:
+                rows = self._scoped_rows(conn, expression, video_ids, limit)
+
+        return [
+            {"video_id": vid, "start": start, "end": end, "snippet": snippet, "score": score}
+            for vid, start, end, snippet, score in rows
+        ]
+
+    def _scoped_rows(self, conn, expression: str, video_ids: List[str], limit: int, k1: float = 1.2, b: float = 0.75):
+        """
+        One rowid-range query per video, so the cost follows the scope, not the corpus.
+        FTS5's bm25() would rescan every term's corpus-wide doclist in each of those
+        queries, so hits are ranked here with BM25's term-frequency and length parts
+        instead: every hit contains every query term, so IDF would only re-weight repeats.
+        """
+        hits = []
+        for slot in self._slots(conn, video_ids).values():
+            hits.extend(conn.execute(
+                "SELECT video_id, start_time, end_time, snippet(segments, 0, '[', ']', '…', 16), "
+                "highlight(segments, 0, char(1), char(2)) "
+                "FROM segments WHERE segments MATCH ? AND rowid BETWEEN ? AND ?",
+                (expression, *self._rowid_range(slot))
+            ).fetchall())
+        if not hits:
+            return []
+
+        lengths = [len(marked.split()) for *_, marked in hits]
+        avg_length = sum(lengths) / len(lengths) or 1.0
+        scored = []
+        for (vid, start, end, snippet, marked), length in zip(hits, lengths):
+            tf = sum(len(span.split("\x02", 1)[0].split()) for span in marked.split("\x01")[1:])
+            score = tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_length))
+            scored.append((vid, start, end, snippet, score))
+        return heapq.nlargest(limit, scored, key=lambda r: r[4])
+
+    def filter_videos(self, text: str, video_ids: List[str]) -> List[str]:
+        """
+        Keyword prefilter: the subset of `video_ids` whose transcript shares at least one
+        term with `text`, plus every video that isn't indexed (nothing known about it,
+        so it isn't ruled out). Order is preserved.
+        """
+        expression = fts_query(text, match_all=False)
+        if not expression or not video_ids:
+            return list(video_ids)
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                slots = self._slots(conn, list(dict.fromkeys(video_ids)))
+                matched = {
+                    vid for vid, slot in slots.items()
+                    if conn.execute(
+                        "SELECT 1 FROM segments WHERE segments MATCH ? AND rowid BETWEEN ? AND ? LIMIT 1",
+                        (expression, *self._rowid_range(slot))
+                    ).fetchone()
+                }
+        except Exception as e:
+            logger.warning(f"Keyword prefilter failed: {e}")
+            return list(video_ids)
+        return [v for v in video_ids if v in matched or v not in slots]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            conn = self._get_conn()
+            return {
+                "videos": conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0],
+                "lessons": conn.execute("SELECT COUNT(*) FROM lesson_videos").fetchone()[0],
+            }
+
+transcript_index = TranscriptIndex(os.path.join(settings.CACHE_DIR, "transcript_index.sqlite3"))
@@ -0,0 +1,142 @@
+import logging
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Optional
+from youtube_transcript_api import (
+    YouTubeTranscriptApi,
+    TranscriptsDisabled,
+    NoTranscriptFound,
+    VideoUnavailable,
+    InvalidVideoId,
+)
+from app.core.config import settings
+from app.utils.compact_transcript import CompactTranscript
+from app.utils.disk_cache import DiskCache
+from app.utils.rate_limiter import TokenBucket
+from app.utils.single_flight import SingleFlight
+from app.utils.transcript_index import transcript_index
+
+logger = logging.getLogger(__name__)
+
+# Answers that won't change by asking again soon: cached as "no transcript"
+_PERMANENT_ERRORS = (TranscriptsDisabled, NoTranscriptFound, VideoUnavailable, InvalidVideoId)
+
+class _NoTranscript:
+    """Marker stored for videos without (usable) captions."""
+    def __repr__(self):
+        return "NO_TRANSCRIPT"
+
+NO_TRANSCRIPT = _NoTranscript()
+_MISSING = object()
+
+# Shared by every upstream transcript fetch in the process; cache hits don't take a token
+transcript_rate_limiter = TokenBucket(settings.TRANSCRIPT_FETCH_RATE, settings.TRANSCRIPT_FETCH_BURST)
+
+def _dumps(value) -> bytes:
+    if value is NO_TRANSCRIPT:
+        return b""
+    return zlib.compress(value.to_bytes(), 6)
+
+def _loads(blob: bytes):
+    if not blob:
+        return NO_TRANSCRIPT
+    return CompactTranscript.from_bytes(zlib.decompress(blob))
+
+def fetch_segments(video_id: str, language: str):
+    """Raw caption segments from YouTube; works with both the pre-1.0 and 1.x transcript API."""
+    if hasattr(YouTubeTranscriptApi, "get_transcript"):
+        return YouTubeTranscriptApi.get_transcript(video_id, languages=[language])
+    return YouTubeTranscriptApi().fetch(video_id, languages=[language])
+
+class TranscriptStore:
+    """
+    Local transcript store keyed by (video_id, language): zlib-compressed CompactTranscript
+    blobs in a DiskCache, with TTL. Videos without captions are cached too (shorter TTL),
+    so they aren't re-asked on every course that contains them. Transient failures
+    (network, rate limits) are not cached. Concurrent misses for a video share one fetch.
+    The most recently used decoded transcripts also stay in memory (LRU), so hot
+    videos (e.g. the player polling caption windows) skip SQLite and zlib entirely.
+    """
+    def __init__(self, cache: DiskCache, negative_ttl_seconds: int, memory_entries: int = 64):
+        self.cache = cache
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, CompactTranscript]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._flight = SingleFlight()
+
+    @staticmethod
+    def _key(video_id: str, language: str) -> str:
+        return f"{video_id}:{language}"
+
+    def get(self, video_id: str, language: Optional[str] = None) -> Optional[CompactTranscript]:
+        """The transcript, or None when the video has none (or it couldn't be fetched)."""
+        language = language or settings.TRANSCRIPT_LANGUAGE
+        key = self._key(video_id, language)
+        transcript = self.get_in_memory(video_id, language)
+        if transcript is not None:
+            return transcript
+        cached = self.cache.get(key, _MISSING)
+        if cached is NO_TRANSCRIPT:
+            return None
+        if cached is _MISSING:
+            cached = self._flight.do(key, self._fetch_and_store, video_id, language)
+        if cached is not None:
+            self._remember(key, cached)
+        return cached
+
+    def get_in_memory(self, video_id: str, language: Optional[str] = None) -> Optional[CompactTranscript]:
+        """Decoded transcript from the in-memory LRU only; no disk, no network (safe on the event loop)."""
+        key = self._key(video_id, language or settings.TRANSCRIPT_LANGUAGE)
+        with self._memory_lock:
+            transcript = self._memory.get(key)
+            if transcript is not None:
+                self._memory.move_to_end(key)
+            return transcript
+
+    def _remember(self, key: str, transcript: CompactTranscript):
+        with self._memory_lock:
+            self._memory[key] = transcript
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _fetch_and_store(self, video_id: str, language: str) -> Optional[CompactTranscript]:
+        key = self._key(video_id, language)
+        try:
+            transcript_rate_limiter.acquire()
+            transcript = CompactTranscript.from_segments(fetch_segments(video_id, language))
+        except _PERMANENT_ERRORS as e:
+            logger.info(f"No transcript for {video_id} ({language}): {type(e).__name__}")
+            self.cache.set(key, NO_TRANSCRIPT, ttl_seconds=self.negative_ttl_seconds)
+            return None
+        except Exception as e:
+            logger.warning(f"Error fetching transcript for {video_id}: {e}")
+            return None
+
+        if not transcript:
+            self.cache.set(key, NO_TRANSCRIPT, ttl_seconds=self.negative_ttl_seconds)
+            return None
+        self.cache.set(key, transcript)
+        if language == settings.TRANSCRIPT_LANGUAGE:
+            # Keep the keyword index in step with every fetched transcript
+            transcript_index.index_transcript(video_id, transcript)
+        return transcript
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+transcript_store = TranscriptStore(
+    DiskCache(
+        path=os.path.join(settings.CACHE_DIR, "transcripts.sqlite3"),
+        table="transcripts",
+        ttl_seconds=settings.TRANSCRIPT_CACHE_TTL_SECONDS,
+        max_entries=settings.TRANSCRIPT_CACHE_MAX_ENTRIES,
+        dumps=_dumps,
+        loads=_loads
+    ),
+    negative_ttl_seconds=settings.TRANSCRIPT_NEGATIVE_TTL_SECONDS,
+    memory_entries=settings.TRANSCRIPT_MEMORY_CACHE_SIZE
+)
@@ -1,98 +1,141 @@
-import subprocess
-import json
 import logging
-import shutil
+import os
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Iterator, Optional
+from app.core.config import settings
+from app.utils.disk_cache import DiskCache, normalize_query
+from app.utils.single_flight import SingleFlight
+from app.utils.search_provider import SearchProvider, get_search_provider
 
 logger = logging.getLogger(__name__)
 
+# Shared by every search caller (see VideoService.search_video)
+search_cache = DiskCache(
+    path=os.path.join(settings.CACHE_DIR, "search_cache.sqlite3"),
+    table="search_results",
+    ttl_seconds=settings.SEARCH_CACHE_TTL_SECONDS,
+    max_entries=settings.SEARCH_CACHE_MAX_ENTRIES
+)
+# Per-video metadata (views, likes, duration...) changes slowly, so one fetch serves many courses
+video_meta_cache = DiskCache(
+    path=os.path.join(settings.CACHE_DIR, "video_meta.sqlite3"),
+    table="video_meta",
+    ttl_seconds=settings.VIDEO_META_TTL_SECONDS,
+    max_entries=settings.VIDEO_META_CACHE_MAX_ENTRIES
+)
+# Concurrent cache misses for the same key share one upstream search
+search_flight = SingleFlight()
+
 class YouTubeAPI:
-    def __init__(self):
-        # Check if yt-dlp is installed
-        if not shutil.which("yt-dlp"):
-             logger.critical("yt-dlp not found in PATH! Video generation will fail.")
+    """
+    Single entry point for video search and metadata.
+    Results come from a SearchProvider (yt-dlp by default, see SEARCH_PROVIDER);
+    this layer adds the disk caches and request coalescing.
+    """
+    def __init__(self, provider: Optional[SearchProvider] = None):
+        self._provider = provider
+
+    @property
+    def provider(self) -> SearchProvider:
+        if self._provider is None:
+            self._provider = get_search_provider()
+        return self._provider
 
-    def search_videos(self, query: str, max_results: int = 20):
+    def search_videos(self, query: str, max_results: int = 20, timeout: float = None):
         """
-        Search using yt-dlp CLI. Robust and quota-free.
+        Search videos through the configured provider. Robust and quota-free.
+        Results are cached on disk per (normalized query, max_results), and concurrent
+        identical searches are coalesced into one.
         """
-        logger.info(f"Searching via yt-dlp: {query}")
-        
-        # yt-dlp arguments:
-        # --dump-json: output JSON
-        # --flat-playlist: don't download, just list
-        # --no-warnings: silent
-        # ytsearchN:query : search N results
-        cmd = [
-            "yt-dlp",
-            "--dump-json",
-            "--flat-playlist",
-            "--no-warnings",
-            f"ytsearch{max_results}:{query}"
-        ]
-        
+        cache_key = self._cache_key(query, max_results)
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Search cache hit: {query}")
+            return cached
+
+        return search_flight.do(cache_key, self._search_and_cache, cache_key, query, max_results, timeout)
+
+    def _search_and_cache(self, cache_key: str, query: str, max_results: int, timeout: float):
+        results = self._search_videos_uncached(query, max_results, timeout or settings.SEARCH_TIMEOUT_SECONDS)
+        # Empty results are usually transient failures - don't pin them for a day
+        if results:
+            search_cache.set(cache_key, results)
+        return results
+
+    def iter_search_videos(self, query: str, max_results: int = 20, timeout: float = None) -> Iterator[dict]:
+        """
+        Streaming variant of search_videos; stops (without raising) once `timeout` elapses.
+        An early-stopped stream is cached as a prefix and replayed before searching live.
+        """
+        cache_key = self._cache_key(query, max_results)
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Search cache hit: {query}")
+            yield from cached
+            return
+
+        prefix_key = f"{cache_key}:prefix"
+        results = search_cache.get(prefix_key) or []
+        seen = {v["id"] for v in results}
+        yield from list(results)
+
+        logger.info(f"Streaming search via {self.provider.name}: {query}")
+        complete = False
         try:
-            # Run command
-            # Using encoding='utf-8' to handle emoji/chars
-            process = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8')
-            
-            if process.returncode != 0:
-                logger.error(f"yt-dlp search failed: {process.stderr}")
-                return []
-                
-            results = []
-            
-            # Output is one JSON object per line
-            for line in process.stdout.strip().split('\n'):
-                if not line: continue
-                try:
-                    data = json.loads(line)
-                    
-                    # Extract fields
-                    # yt-dlp flat-playlist often gives: id, title, uploader, duration, view_count (sometimes)
-                    
-                    vid_id = data.get('id')
-                    title = data.get('title')
-                    
-                    # Basic filters
-                    if not vid_id or not title: continue
-                    
-                    # Duration is usually float seconds
-                    duration = data.get('duration', 0)
-                    if isinstance(duration, (int, float)):
-                        duration_sec = int(duration)
-                    else:
-                        duration_sec = 0
-                        
-                    # View count might be missing in flat-playlist mode for some searches,
-                    # but we'll take what we get.
-                    view_count = data.get('view_count', 0)
-                    if view_count is None: view_count = 0 
-                    
-                    video_obj = {
-                        "id": vid_id,
-                        "title": title,
-                        "channel": data.get('uploader', 'Unknown'),
-                        "channel_id": data.get('uploader_id', ''),
-                        "duration_sec": duration_sec, # Use distinct key for clarity
-                        "view_count": int(view_count),
-                        "link": f"https://www.youtube.com/watch?v={vid_id}",
-                        "published_at": data.get('upload_date', ''), # YYYYMMDD
-                        "thumbnail": f"https://i.ytimg.com/vi/{vid_id}/hqdefault.jpg" # Construct standard thumb
-                    }
+            for video_obj in self.provider.iter_search(query, max_results, timeout=timeout or settings.SEARCH_TIMEOUT_SECONDS):
+                if video_obj["id"] not in seen:
+                    seen.add(video_obj["id"])
                     results.append(video_obj)
-                    
-                except Exception as loop_e:
-                    logger.warning(f"Failed to parse yt-dlp line: {loop_e}")
-                    continue
-            
-            logger.info(f"yt-dlp found {len(results)} videos")
-            return results
+                    yield video_obj
+            complete = True
+        except FutureTimeoutError:
+            logger.warning(f"Search timed out after {len(results)} videos: {query}")
+        except Exception as e:
+            logger.error(f"Search failed: {e}")
+        finally:
+            # Also runs when the caller stops early (GeneratorExit)
+            if complete and results:
+                search_cache.set(cache_key, results)
+                search_cache.delete(prefix_key)
+            elif results:
+                search_cache.set(prefix_key, results)
+
+    def _cache_key(self, query: str, max_results: int) -> str:
+        return f"{self.provider.name}:{max_results}:{normalize_query(query)}"
 
+    def _search_videos_uncached(self, query: str, max_results: int, timeout: float):
+        logger.info(f"Searching via {self.provider.name}: {query}")
+        
+        try:
+            results = self.provider.search(query, max_results, timeout=timeout)
+        except FutureTimeoutError:
+            logger.error(f"Search timed out after {timeout}s: {query}")
+            return []
         except Exception as e:
-            logger.error(f"yt-dlp execution error: {e}")
+            logger.error(f"Search failed: {e}")
             return []
 
-    def get_video_details(self, video_ids: list[str]):
-        return []
-            
+        logger.info(f"{self.provider.name} found {len(results)} videos")
+        return results
+
+    def get_video_details(self, video_ids: list[str], timeout: float = None) -> list[dict]:
+        """
+        Full metadata (views, likes, duration, description, captions) for many videos at once.
+        Served from the per-video cache where fresh; the rest are fetched in one batch from the
+        provider (concurrently, for yt-dlp) and cached. Videos that fail to resolve are left out.
+        """
+        unique_ids = list(dict.fromkeys(v for v in video_ids if v))
+        details = video_meta_cache.get_many(unique_ids)
+        missing = [vid for vid in unique_ids if vid not in details]
+
+        if missing:
+            logger.info(f"Fetching details for {len(missing)} videos ({len(details)} cached)")
+            fetched = {
+                d["id"]: d
+                for d in self.provider.get_details(missing, timeout=timeout or settings.SEARCH_TIMEOUT_SECONDS)
+            }
+            video_meta_cache.set_many(fetched)
+            details.update(fetched)
+
+        return [details[vid] for vid in unique_ids if vid in details]
 youtube_client = YouTubeAPI()
@@ -0,0 +1,140 @@
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from typing import Dict, Iterator, List, Optional
+
+import yt_dlp
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class YtDlpEngine:
+    """
+    In-process yt-dlp runner.
+    Spawning the yt-dlp CLI boots a fresh interpreter and re-imports every extractor per call,
+    so instead we keep YoutubeDL instances warm inside a bounded worker pool.
+    YoutubeDL is not thread-safe, so each worker thread owns its own instances.
+    """
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ytdlp")
+        self._local = threading.local()
+
+    def _get_ydl(self, flat: bool) -> yt_dlp.YoutubeDL:
+        instances = getattr(self._local, "instances", None)
+        if instances is None:
+            instances = self._local.instances = {}
+        if flat not in instances:
+            opts = {
+                "quiet": True,
+                "no_warnings": True,
+                "skip_download": True,
+            }
+            if flat:
+                # Same as --flat-playlist: list search entries without resolving each video
+                opts["extract_flat"] = "in_playlist"
+            instances[flat] = yt_dlp.YoutubeDL(opts)
+        return instances[flat]
+
+    def _extract(self, url: str, flat: bool) -> Dict:
+        ydl = self._get_ydl(flat)
+        info = ydl.extract_info(url, download=False)
+        # Same JSON-safe shape --dump-json prints
+        return ydl.sanitize_info(info)
+
+    def extract(self, url: str, flat: bool = True, timeout: Optional[float] = None) -> Dict:
+        """
+        Runs extract_info on a pool worker.
+        Raises concurrent.futures.TimeoutError if it takes longer than `timeout`; a job still
+        queued by then is cancelled (one already running finishes in the background).
+        """
+        future = self._executor.submit(self._extract, url, flat)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    def extract_many(self, urls: List[str], flat: bool = False, timeout: Optional[float] = None) -> List[Optional[Dict]]:
+        """
+        Extracts several URLs concurrently (bounded by the pool size).
+        Returns results aligned with `urls`; failures and anything unfinished at `timeout` are None.
+        """
+        futures = [self._executor.submit(self._extract, url, flat) for url in urls]
+        done, not_done = wait(futures, timeout=timeout)
+        for future in not_done:
+            future.cancel()
+
+        results: List[Optional[Dict]] = []
+        for url, future in zip(urls, futures):
+            if future not in done:
+                results.append(None)
+                continue
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.warning(f"yt-dlp extract failed for {url}: {e}")
+                results.append(None)
+        return results
+
+    def search(self, query: str, max_results: int, flat: bool = True, timeout: Optional[float] = None) -> List[Dict]:
+        """Returns raw yt-dlp entry dicts for `ytsearchN:query`, one per video."""
+        info = self.extract(f"ytsearch{max_results}:{query}", flat=flat, timeout=timeout)
+        return [e for e in (info.get("entries") or []) if e]
+
+    def iter_search(self, query: str, max_results: int, timeout: Optional[float] = None) -> Iterator[Dict]:
+        """
+        Streams flat entries for `ytsearchN:query` as yt-dlp pages through results.
+        Raises concurrent.futures.TimeoutError after `timeout`, once already-fetched entries are yielded.
+        """
+        out: "queue.Queue" = queue.Queue()
+        stop = threading.Event()
+
+        def produce():
+            finished = False
+            try:
+                ydl = self._get_ydl(flat=True)
+                # process=False keeps `entries` lazy: pages are fetched only as we iterate
+                info = ydl.extract_info(f"ytsearch{max_results}:{query}", download=False, process=False)
+                for entry in info.get("entries") or []:
+                    if stop.is_set():
+                        break
+                    if entry:
+                        out.put(("entry", ydl.sanitize_info(entry)))
+                else:
+                    finished = True
+            except Exception as e:
+                out.put(("error", e))
+            finally:
+                out.put(("done", finished))
+
+        future = self._executor.submit(produce)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while True:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                try:
+                    if remaining is not None and remaining <= 0:
+                        # Out of time: stop the worker, but drain what it already fetched
+                        stop.set()
+                        kind, payload = out.get_nowait()
+                    else:
+                        kind, payload = out.get(timeout=remaining)
+                except queue.Empty:
+                    raise FutureTimeoutError()
+                if kind == "done":
+                    if not payload and stop.is_set():
+                        # Worker was stopped at the deadline, so the results are incomplete
+                        raise FutureTimeoutError()
+                    return
+                if kind == "error":
+                    raise payload
+                yield payload
+        finally:
+            stop.set()
+            future.cancel() # never started: don't let it run a search nobody reads
+
+ytdlp_engine = YtDlpEngine(max_workers=settings.YTDLP_WORKERS)